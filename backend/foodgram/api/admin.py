@@ -9,7 +9,7 @@ from .models import (Cart, Favorite, Follow, Ingredient, IngredientQuantity,
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     list_filter = ('email', 'username',)
-    list_display = ('username', 'email',)
+    list_display = ('username', 'email', 'recipes_count', 'followers_count',)
     search_fields = ('username', 'email',)
 
 
@@ -19,8 +19,9 @@ class RecipeAdmin(admin.ModelAdmin):
     list_display = ('name', 'author', 'favorited_counter', 'tag',)
     search_fields = ('name', 'author__username', 'tags__name',)
 
+    @admin.display(description='в избранном', ordering='favorites_count')
     def favorited_counter(self, obj):
-        return obj.favorite.count()
+        return obj.favorites_count
 
     def tag(self, obj):
         return list(Recipe.objects.get(name=obj).tags.all())
@@ -0,0 +1,107 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from .cache import bump_version, get_version
+from .metrics import metrics_store
+
+TOKEN_CACHE_TIMEOUT = 60 * 10
+TOKEN_CACHE_METRIC = 'foodgram_token_cache_lookups_total'
+LOCAL_HIT = 'local_hit'
+SHARED_HIT = 'shared_hit'
+MISS = 'miss'
+
+
+def tokens_version_key(user_id):
+    return f'version:tokens:{user_id}'
+
+
+def token_cache_key(key):
+    return 'token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def is_current(credentials):
+    user_id, _, version = credentials
+    return version == get_version(tokens_version_key(user_id))
+
+
+class LocalTokenCache:
+
+    def __init__(self, size):
+        self.size = size
+        self.lock = threading.Lock()
+        self.tokens = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            credentials = self.tokens.get(key)
+            if credentials is not None:
+                self.tokens.move_to_end(key)
+            return credentials
+
+    def set(self, key, credentials):
+        with self.lock:
+            self.tokens[key] = credentials
+            self.tokens.move_to_end(key)
+            if len(self.tokens) > self.size:
+                self.tokens.popitem(last=False)
+
+
+local_tokens = LocalTokenCache(getattr(settings, 'TOKEN_CACHE_SIZE', 10000))
+
+
+def invalidate_tokens(user_id):
+    bump_version(tokens_version_key(user_id))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+
+    def authenticate_credentials(self, key):
+        credentials = local_tokens.get(key)
+        if credentials is not None and is_current(credentials):
+            metrics_store.increment(TOKEN_CACHE_METRIC, LOCAL_HIT)
+        else:
+            credentials = self.get_shared_credentials(key, credentials)
+            local_tokens.set(key, credentials)
+        user_id, is_active, _ = credentials
+        if not is_active:
+            raise AuthenticationFailed('Пользователь неактивен или удалён')
+        user_model = get_user_model()
+        user = user_model.from_db(
+            router.db_for_read(user_model),
+            ('id', 'is_active'),
+            (user_id, is_active),
+        )
+        token = self.get_model().from_db(
+            user._state.db, ('key', 'user_id'), (key, user_id)
+        )
+        token.user = user
+        return user, token
+
+    def get_shared_credentials(self, key, stale):
+        cache_key = token_cache_key(key)
+        credentials = cache.get(cache_key) or stale
+        if credentials is not None and is_current(credentials):
+            metrics_store.increment(TOKEN_CACHE_METRIC, SHARED_HIT)
+            return credentials
+        metrics_store.increment(TOKEN_CACHE_METRIC, MISS)
+        if credentials is None:
+            user_id = self.get_model().objects.filter(
+                key=key
+            ).values_list('user_id', flat=True).first()
+            if user_id is None:
+                raise AuthenticationFailed('Недействительный токен')
+        else:
+            user_id = credentials[0]
+        version = get_version(tokens_version_key(user_id))
+        user = super().authenticate_credentials(key)[0]
+        credentials = (user.id, user.is_active, version)
+        cache.set(cache_key, credentials, TOKEN_CACHE_TIMEOUT)
+        return credentials
@@ -0,0 +1,32 @@
+from django.db import transaction
+
+
+class CommitBatch:
+
+    def __init__(self, function):
+        self.function = function
+        self.items = {}
+
+    def __call__(self):
+        self.function(list(self.items))
+
+
+def find_batch(connection, function):
+    for _, callback, *_ in connection.run_on_commit:
+        if isinstance(callback, CommitBatch) and callback.function == function:
+            return callback
+    return None
+
+
+def on_commit_batch(function, items, using=None):
+    connection = transaction.get_connection(using)
+    batch = None
+    if connection.in_atomic_block:
+        batch = find_batch(connection, function)
+    if batch is not None:
+        batch.items.update(dict.fromkeys(items))
+        return
+    batch = CommitBatch(function)
+    batch.items.update(dict.fromkeys(items))
+    if batch.items:
+        transaction.on_commit(batch, using)
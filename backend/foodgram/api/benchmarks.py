@@ -0,0 +1,63 @@
+import json
+import math
+import statistics
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+API = '/api/'
+SAMPLE_SIZE = 200
+PERCENTILES = (50, 95, 99)
+PANTRY_SIZE = 20
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+def mean(values, digits=2):
+    return round(statistics.mean(values), digits)
+
+
+def summarize(latencies, digits=3, **extra):
+    return {
+        'requests': len(latencies),
+        **{
+            f'p{percent}_ms': round(percentile(latencies, percent), digits)
+            for percent in PERCENTILES
+        },
+        'mean_ms': mean(latencies, digits),
+        **extra,
+    }
+
+
+def sample_ids(queryset, rng, size=SAMPLE_SIZE):
+    ids = list(queryset.values_list('id', flat=True))
+    return rng.sample(ids, min(size, len(ids)))
+
+
+class BenchmarkCommand(BaseCommand):
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--label', default='', help='Метка прогона')
+        parser.add_argument('--output', help='Файл для результатов')
+
+    def handle(self, *args, **options):
+        report = json.dumps(
+            {
+                'label': options['label'],
+                'database': connection.vendor,
+                **self.run(options),
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(report)
+        self.stdout.write(report)
+
+    def run(self, options):
+        raise NotImplementedError
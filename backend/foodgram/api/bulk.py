@@ -0,0 +1,43 @@
+from itertools import islice
+
+from django.db import connections, router
+
+BATCH_SIZE = 1000
+
+
+def bulk_upsert(model, fields, rows, unique_fields, update_fields,
+                batch_size=BATCH_SIZE):
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    columns = [model._meta.get_field(field).column for field in fields]
+    sql = (
+        'INSERT INTO {table} ({columns}) VALUES {{values}} '
+        'ON CONFLICT ({unique}) DO UPDATE SET {updates}'
+    ).format(
+        table=quote(model._meta.db_table),
+        columns=', '.join(map(quote, columns)),
+        unique=', '.join(
+            quote(model._meta.get_field(field).column)
+            for field in unique_fields
+        ),
+        updates=', '.join(
+            '{0} = EXCLUDED.{0}'.format(
+                quote(model._meta.get_field(field).column)
+            )
+            for field in update_fields
+        ),
+    )
+    placeholders = '({})'.format(', '.join(['%s'] * len(columns)))
+    batch_size = min(
+        batch_size, connection.ops.bulk_batch_size(columns, range(batch_size))
+    )
+    rows = iter(rows)
+    written = 0
+    with connection.cursor() as cursor:
+        for batch in iter(lambda: list(islice(rows, batch_size)), []):
+            cursor.execute(
+                sql.format(values=', '.join([placeholders] * len(batch))),
+                [value for row in batch for value in row],
+            )
+            written += len(batch)
+    return written
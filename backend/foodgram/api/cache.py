@@ -0,0 +1,127 @@
+import hashlib
+import time
+
+from django.core.cache import cache, caches
+
+from .batches import on_commit_batch
+from .models import Cart, Favorite, Follow
+from .replicas import VERSIONS_CACHE, fresh_reads
+
+INGREDIENTS_VERSION_KEY = 'version:ingredients'
+RECIPES_VERSION_KEY = 'version:recipes'
+TAGS_VERSION_KEY = 'version:tags'
+RESPONSE_CACHE_TIMEOUT = 60 * 10
+RESPONSE_CACHE_HITS = 'hits'
+RESPONSE_CACHE_MISSES = 'misses'
+RESPONSE_CACHE_EVICTIONS = 'evictions'
+RESPONSE_CACHE_COUNTERS = (
+    RESPONSE_CACHE_HITS, RESPONSE_CACHE_MISSES, RESPONSE_CACHE_EVICTIONS
+)
+FAVORITES = 'favorites'
+SHOPPING_CART = 'shopping_cart'
+FOLLOWING = 'following'
+MEMBERSHIP_TIMEOUT = 60 * 60 * 24
+MEMBERSHIP_QUERIES = {
+    FAVORITES: lambda user_id: Favorite.objects.filter(
+        user_id=user_id
+    ).order_by().values_list('recipe_id', flat=True),
+    SHOPPING_CART: lambda user_id: Cart.objects.filter(
+        user_id=user_id
+    ).order_by().values_list('recipe_id', flat=True),
+    FOLLOWING: lambda user_id: Follow.objects.filter(
+        follower_id=user_id
+    ).order_by().values_list('author_id', flat=True),
+}
+
+
+def get_version(key):
+    versions = caches[VERSIONS_CACHE]
+    version = versions.get(key)
+    if version is None:
+        versions.add(key, time.time_ns(), None)
+        version = versions.get(key)
+    return version
+
+
+def bump_version(key):
+    caches[VERSIONS_CACHE].set(key, time.time_ns(), None)
+
+
+def bump_versions(keys):
+    for key in keys:
+        bump_version(key)
+
+
+def bump_versions_on_commit(*keys):
+    on_commit_batch(bump_versions, keys)
+
+
+def get_versions(keys):
+    return [get_version(key) for key in keys]
+
+
+def normalized_query(request):
+    return sorted(
+        (key, sorted(values))
+        for key, values in request.query_params.lists()
+    )
+
+
+def response_cache_key(request, basename, action, kwargs):
+    query = normalized_query(request)
+    raw_key = f'{request.get_host()}:{basename}:{action}:{kwargs}:{query}'
+    return 'response:' + hashlib.md5(raw_key.encode()).hexdigest()
+
+
+def count_response_cache(counter):
+    key = f'stats:response_cache:{counter}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def get_response_cache_stats():
+    return {
+        counter: cache.get(f'stats:response_cache:{counter}', 0)
+        for counter in RESPONSE_CACHE_COUNTERS
+    }
+
+
+def membership_version_key(kind, user_id):
+    return f'version:{kind}:{user_id}'
+
+
+def get_membership(kind, user_id):
+    version = get_version(membership_version_key(kind, user_id))
+    key = f'{kind}:{user_id}:{version}'
+    ids = cache.get(key)
+    if ids is None:
+        with fresh_reads((version,)):
+            ids = frozenset(MEMBERSHIP_QUERIES[kind](user_id))
+        cache.set(key, ids, MEMBERSHIP_TIMEOUT)
+    return ids
+
+
+def get_membership_versions(user_id):
+    return get_versions(
+        membership_version_key(kind, user_id) for kind in MEMBERSHIP_QUERIES
+    )
+
+
+def bump_membership(kind, user_id):
+    bump_version(membership_version_key(kind, user_id))
+
+
+class UserMemberships:
+
+    def __init__(self, user):
+        self.user = user
+        self.sets = {}
+
+    def get(self, kind):
+        if self.user is None:
+            return frozenset()
+        if kind not in self.sets:
+            self.sets[kind] = get_membership(kind, self.user.id)
+        return self.sets[kind]
@@ -0,0 +1,266 @@
+import heapq
+import threading
+from array import array
+from collections import Counter
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, FloatField, Q
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .cache import RECIPES_VERSION_KEY, get_version
+from .models import IngredientQuantity, Recipe
+from .replicas import fresh_reads
+
+COOKABLE_LIMIT = 10
+MAX_COOKABLE_LIMIT = 50
+MAX_COOKABLE_INGREDIENTS = 100
+SYNC_OVERLAP = timedelta(seconds=60)
+MAX_OVERLAY_RECIPES = 10000
+UNRANKED = 1 << 40
+
+
+def recipe_ingredients(queryset):
+    rows = queryset.values_list('recipe_id', 'ingredient_id').order_by(
+        'recipe_id'
+    )
+    for recipe, group in groupby(rows.iterator(), itemgetter(0)):
+        yield recipe, [ingredient for _, ingredient in group]
+
+
+def get_changed_recipes(since):
+    return Recipe.objects.filter(updated_at__gte=since).values_list(
+        'id', 'updated_at'
+    ).order_by()
+
+
+def upper_bound(position, size, remaining):
+    matched = min(size - position, remaining)
+    return matched / size, matched - size
+
+
+def group_postings(postings):
+    return {
+        ingredient: [
+            (position, size, entries)
+            for (position, size), entries in lists.items()
+        ]
+        for ingredient, lists in postings.items()
+    }
+
+
+class CookableIndex:
+
+    def __init__(self):
+        self.version = None
+        self.synced_at = None
+        self.lock = threading.Lock()
+        self.building = False
+        self.ready = False
+        self.base = None
+        self.overlay = ({}, {})
+
+    def build(self):
+        started = timezone.now()
+        recipes = array('q')
+        offsets = array('l', (0,))
+        ingredients = array('l')
+        for recipe, items in recipe_ingredients(
+            IngredientQuantity.objects.all()
+        ):
+            recipes.append(recipe)
+            ingredients.extend(items)
+            offsets.append(len(ingredients))
+        ranks = {
+            ingredient: rank for rank, (_, ingredient) in enumerate(sorted(
+                (count, ingredient)
+                for ingredient, count in Counter(ingredients).items()
+            ))
+        }
+        postings = {}
+        for index in range(len(recipes)):
+            start, end = offsets[index], offsets[index + 1]
+            ordered = sorted(ingredients[start:end], key=ranks.__getitem__)
+            ingredients[start:end] = array('l', ordered)
+            for position, ingredient in enumerate(ordered):
+                postings.setdefault(ingredient, {}).setdefault(
+                    (position, end - start), array('l')
+                ).append(index)
+        base = (recipes, offsets, ingredients, ranks, group_postings(postings))
+        with self.lock:
+            self.base = base
+            self.overlay = ({}, {})
+            self.synced_at = started
+            self.version = None
+            self.ready = True
+
+    def build_in_background(self):
+        close_old_connections()
+        try:
+            self.build()
+        finally:
+            self.building = False
+            close_old_connections()
+
+    def start_build(self):
+        with self.lock:
+            if self.building:
+                return
+            self.building = True
+        threading.Thread(
+            target=self.build_in_background, name='cookable', daemon=True
+        ).start()
+
+    def apply(self, updates):
+        ranks = self.base[3]
+        changed = {**self.overlay[0], **{
+            recipe: tuple(sorted(
+                ingredients,
+                key=lambda ingredient: ranks.get(
+                    ingredient, UNRANKED + ingredient
+                ),
+            ))
+            for recipe, ingredients in updates.items()
+        }}
+        postings = {}
+        for recipe in sorted(changed):
+            ingredients = changed[recipe]
+            for position, ingredient in enumerate(ingredients):
+                postings.setdefault(ingredient, {}).setdefault(
+                    (position, len(ingredients)), []
+                ).append(recipe)
+        self.overlay = (changed, group_postings(postings))
+
+    def sync(self):
+        started = timezone.now()
+        since = self.synced_at - SYNC_OVERLAP
+        recipes = dict(get_changed_recipes(since))
+        changed = sum(
+            updated_at >= self.synced_at for updated_at in recipes.values()
+        )
+        if len(self.overlay[0]) + changed > MAX_OVERLAY_RECIPES:
+            return False
+        updates = dict.fromkeys(recipes, ())
+        updates.update(recipe_ingredients(IngredientQuantity.objects.filter(
+            recipe__updated_at__gte=since
+        )))
+        self.apply(updates)
+        self.synced_at = started
+        return True
+
+    def refresh(self):
+        if self.ready:
+            version = get_version(RECIPES_VERSION_KEY)
+            if version == self.version:
+                return True
+            with self.lock:
+                if self.ready and version != self.version:
+                    with fresh_reads((version,)):
+                        self.ready = self.sync()
+                    if self.ready:
+                        self.version = version
+        if not self.ready:
+            self.start_build()
+        return self.ready
+
+    def forget(self, recipe_ids):
+        with self.lock:
+            if self.base is not None:
+                self.apply(dict.fromkeys(recipe_ids, ()))
+
+    @staticmethod
+    def push(top, limit, recipe, ingredients, query):
+        size = len(ingredients)
+        matched = len(query.intersection(ingredients))
+        entry = (matched / size, matched - size, recipe)
+        if len(top) < limit:
+            heapq.heappush(top, entry)
+        else:
+            heapq.heappushpop(top, entry)
+
+    def search(self, ingredients, limit=COOKABLE_LIMIT):
+        if not self.refresh():
+            return None
+        recipes, offsets, base_ingredients, ranks, postings = self.base
+        changed, overlay = self.overlay
+        query = frozenset(ingredients)
+        ordered = sorted(query, key=lambda ingredient: ranks.get(
+            ingredient, UNRANKED + ingredient
+        ))
+        lists = sorted(
+            (
+                (upper_bound(position, size, remaining), index, entries)
+                for index, source in enumerate((postings, overlay))
+                for remaining, ingredient in enumerate(reversed(ordered), 1)
+                for position, size, entries in source.get(ingredient, ())
+            ),
+            key=itemgetter(0),
+            reverse=True,
+        )
+        top = []
+        seen = set()
+        for bound, index, entries in lists:
+            if len(top) == limit and bound < top[0][:2]:
+                break
+            for entry in reversed(entries):
+                recipe = entry if index else recipes[entry]
+                if len(top) == limit and (*bound, recipe) < top[0]:
+                    break
+                if recipe in seen or not index and recipe in changed:
+                    continue
+                seen.add(recipe)
+                self.push(top, limit, recipe, changed[recipe] if index else (
+                    base_ingredients[offsets[entry]:offsets[entry + 1]]
+                ), query)
+        return [
+            (recipe, coverage, -missing)
+            for coverage, missing, recipe in sorted(top, reverse=True)
+        ]
+
+
+cookable_index = CookableIndex()
+
+
+def forget_recipes_on_commit(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    transaction.on_commit(lambda: cookable_index.forget(recipe_ids))
+
+
+def get_cookable_queryset(ingredients):
+    return IngredientQuantity.objects.filter(
+        recipe__in=IngredientQuantity.objects.filter(
+            ingredient__in=ingredients
+        ).values('recipe')
+    ).values('recipe').annotate(
+        size=Count('id'),
+        matched=Count('id', filter=Q(ingredient__in=ingredients)),
+    ).annotate(
+        coverage=Cast('matched', FloatField()) / F('size'),
+        missing=F('size') - F('matched'),
+    ).order_by('-coverage', 'missing', '-recipe_id').values_list(
+        'recipe', 'coverage', 'missing'
+    )
+
+
+def search_database(ingredients, limit=COOKABLE_LIMIT):
+    return list(get_cookable_queryset(ingredients)[:limit])
+
+
+def find_cookable_recipes(ingredients, limit=COOKABLE_LIMIT):
+    ingredients = list(ingredients)
+    while True:
+        found = cookable_index.search(ingredients, limit)
+        if found is None:
+            found = search_database(ingredients, limit)
+        recipes = Recipe.objects.in_bulk([recipe for recipe, _, _ in found])
+        deleted = [recipe for recipe, _, _ in found if recipe not in recipes]
+        if not deleted:
+            break
+        cookable_index.forget(deleted)
+    for recipe, coverage, missing in found:
+        recipes[recipe].coverage = coverage
+        recipes[recipe].missing = missing
+    return [recipes[recipe] for recipe, _, _ in found]
@@ -0,0 +1,44 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Cart, Favorite, Follow, Recipe, User
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'in_cart_count', Cart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Follow, 'author'),
+)
+
+
+def actual_count(related, field):
+    return Coalesce(
+        Subquery(
+            related.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                total=Count('pk')
+            ).values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def change_counter(model, pk, counter, delta):
+    model.objects.filter(pk=pk).update(
+        **{counter: Greatest(F(counter) + delta, 0)}
+    )
+
+
+def find_drift(model, counter, related, field):
+    return model.objects.annotate(
+        actual=actual_count(related, field)
+    ).exclude(**{counter: F('actual')}).values_list('pk', counter, 'actual')
+
+
+def recount(model, counter, related, field, pks=None):
+    queryset = model.objects.all()
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    return queryset.update(**{counter: actual_count(related, field)})
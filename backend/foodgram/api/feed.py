@@ -0,0 +1,124 @@
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby, islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import Exists, OuterRef
+
+from .models import Follow, Recipe, TimelineEntry, User
+
+FEED_FANOUT_LIMIT = getattr(settings, 'FEED_FANOUT_LIMIT', 1000)
+POPULAR_AUTHORS_KEY = 'feed:popular_authors'
+POPULAR_AUTHORS_TIMEOUT = 60
+BATCH_SIZE = 1000
+
+executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'FEED_WORKERS', 1),
+    thread_name_prefix='feed',
+)
+
+
+def fill_timelines(follows, recipe_ids=None, batch_size=BATCH_SIZE):
+    filters = {
+        'author__followers_count__lte': FEED_FANOUT_LIMIT,
+        'author__recipes__isnull': False,
+    }
+    if recipe_ids is not None:
+        filters['author__recipes__in'] = recipe_ids
+    rows = follows.filter(**filters).values_list(
+        'follower', 'author', 'author__recipes'
+    ).order_by()
+    entries = (
+        TimelineEntry(user_id=user, author_id=author, recipe_id=recipe)
+        for user, author, recipe in rows.iterator()
+    )
+    filled = 0
+    for batch in iter(lambda: list(islice(entries, batch_size)), []):
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        filled += len(batch)
+    return filled
+
+
+def fan_out_recipe(author_id, recipe_id):
+    fill_timelines(Follow.objects.filter(author_id=author_id), (recipe_id,))
+
+
+def backfill_follow(follower_id, author_id):
+    fill_timelines(
+        Follow.objects.filter(follower_id=follower_id, author_id=author_id)
+    )
+
+
+def prune_follow(follower_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=follower_id, author_id=author_id
+    ).delete()
+
+
+def backfill_author(author_id):
+    fill_timelines(Follow.objects.filter(author_id=author_id))
+
+
+def rebuild_timelines(user_ids=None, batch_size=BATCH_SIZE):
+    follows = Follow.objects.all()
+    entries = TimelineEntry.objects.all()
+    if user_ids is not None:
+        follows = follows.filter(follower__in=user_ids)
+        entries = entries.filter(user__in=user_ids)
+    removed, _ = entries.exclude(Exists(Follow.objects.filter(
+        follower=OuterRef('user'), author=OuterRef('author')
+    ))).delete()
+    return fill_timelines(follows, batch_size=batch_size), removed
+
+
+def run_feed_task(task, *args):
+    close_old_connections()
+    try:
+        task(*args)
+    finally:
+        close_old_connections()
+
+
+def schedule_feed_task(task, *args):
+    transaction.on_commit(
+        lambda: executor.submit(run_feed_task, task, *args)
+    )
+
+
+def get_popular_authors():
+    authors = cache.get(POPULAR_AUTHORS_KEY)
+    if authors is None:
+        authors = list(User.objects.filter(
+            followers_count__gt=FEED_FANOUT_LIMIT
+        ).values_list('id', flat=True))
+        cache.set(POPULAR_AUTHORS_KEY, authors, POPULAR_AUTHORS_TIMEOUT)
+    return authors
+
+
+def get_timeline(user):
+    return TimelineEntry.objects.filter(user=user).filter(
+        Exists(Follow.objects.filter(
+            follower=user, author=OuterRef('author')
+        ))
+    ).order_by('-recipe_id').values_list('recipe', flat=True)
+
+
+def get_feed(user, before, limit):
+    entries = get_timeline(user)
+    if before is not None:
+        entries = entries.filter(recipe_id__lt=before)
+    streams = [entries]
+    popular = get_popular_authors()
+    if popular:
+        recipes = Recipe.objects.filter(author__in=Follow.objects.filter(
+            follower=user, author__in=popular
+        ).values('author'))
+        if before is not None:
+            recipes = recipes.filter(id__lt=before)
+        streams.append(recipes.order_by('-id').values_list('id', flat=True))
+    merged = heapq.merge(
+        *(list(stream[:limit]) for stream in streams), reverse=True
+    )
+    return [recipe_id for recipe_id, _ in islice(groupby(merged), limit)]
@@ -1,15 +1,23 @@
 from distutils.util import strtobool
 
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework
 from rest_framework.filters import SearchFilter
 
-from .models import Cart, Favorite, Recipe, Tag
+from .models import Cart, Favorite, Ingredient, Recipe, Tag
+from .search import ingredient_index, search_recipes
 from .utils import check_user_and_request
 
 CHOICES_LIST = (
     ('0', 'False'),
     ('1', 'True')
 )
+TAGS_MODE_ANY = 'any'
+TAGS_MODE_ALL = 'all'
+TAGS_MODES = (
+    (TAGS_MODE_ANY, 'Любой из тэгов'),
+    (TAGS_MODE_ALL, 'Все тэги'),
+)
 
 
 class RecipeFilter(rest_framework.FilterSet):
@@ -28,36 +36,46 @@ class RecipeFilter(rest_framework.FilterSet):
     tags = rest_framework.ModelMultipleChoiceFilter(
         field_name='tags__slug',
         to_field_name='slug',
-        queryset=Tag.objects.all()
+        queryset=Tag.objects.all(),
+        method='tags_method'
+    )
+    tags_mode = rest_framework.ChoiceFilter(
+        choices=TAGS_MODES,
+        method='tags_mode_method'
     )
+    search = rest_framework.CharFilter(method='search_method')
 
-    def is_favorited_method(self, queryset, name, value):
-        check_result, user = check_user_and_request(self.request)
-        if check_result is False:
-            return Recipe.objects.none()
+    def tags_method(self, queryset, name, value):
+        if not value:
+            return queryset
+        tagged = Recipe.tags.through.objects.filter(recipe=OuterRef('pk'))
+        if self.form.cleaned_data.get('tags_mode') != TAGS_MODE_ALL:
+            return queryset.filter(Exists(tagged.filter(tag__in=value)))
+        for tag in value:
+            queryset = queryset.filter(Exists(tagged.filter(tag=tag)))
+        return queryset
 
-        favorites = Favorite.objects.filter(user=user)
-        recipes = [item.recipe.id for item in favorites]
-        new_queryset = queryset.filter(id__in=recipes)
+    def tags_mode_method(self, queryset, name, value):
+        return queryset
 
-        if not strtobool(value):
-            return queryset.difference(new_queryset)
+    def search_method(self, queryset, name, value):
+        return search_recipes(queryset, value)
 
-        return queryset.filter(id__in=recipes)
+    def is_favorited_method(self, queryset, name, value):
+        return self.filter_by_membership(queryset, Favorite, value)
 
     def is_in_shopping_cart_method(self, queryset, name, value):
+        return self.filter_by_membership(queryset, Cart, value)
+
+    def filter_by_membership(self, queryset, model, value):
+        value = strtobool(value)
         check_result, user = check_user_and_request(self.request)
         if check_result is False:
-            return Recipe.objects.none()
-
-        shopping_cart = Cart.objects.filter(user=user)
-        recipes = [item.recipe.id for item in shopping_cart]
-        new_queryset = queryset.filter(id__in=recipes)
-
-        if not strtobool(value):
-            return queryset.difference(new_queryset)
-
-        return queryset.filter(id__in=recipes)
+            return queryset.none() if value else queryset
+        membership = Exists(
+            model.objects.filter(user=user, recipe=OuterRef('pk'))
+        )
+        return queryset.filter(membership if value else ~membership)
 
     class Meta:
         model = Recipe
@@ -66,3 +84,14 @@ class RecipeFilter(rest_framework.FilterSet):
 
 class IngredientFilter(SearchFilter):
     search_param = 'name'
+
+    def filter_queryset(self, request, queryset, view):
+        search = request.query_params.get(self.search_param)
+        if not search or getattr(view, 'action', None) != 'list':
+            return super().filter_queryset(request, queryset, view)
+        return [
+            Ingredient(id=pk, name=name, measurement_unit=measurement_unit)
+            for pk, name, measurement_unit in ingredient_index.rows(
+                ingredient_index.search(search)
+            )
+        ]
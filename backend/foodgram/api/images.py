@@ -0,0 +1,130 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import RECIPES_VERSION_KEY, bump_version
+from .metrics import metrics_store
+from .models import Recipe
+
+THUMBNAIL = 'thumbnail'
+CARD = 'card'
+IMAGE_VARIANT_SIZES = {
+    THUMBNAIL: (144, 144),
+    CARD: (720, 480),
+}
+IMAGE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+DEFAULT_IMAGE_FORMAT = 'webp'
+IMAGE_VARIANTS_DIR = 'variants'
+IMAGE_TASK_METRIC = 'foodgram_image_variant_tasks_total'
+IMAGE_TASK_DONE = 'done'
+IMAGE_TASK_FAILED = 'failed'
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'IMAGE_WORKERS', 2),
+    thread_name_prefix='image-variants',
+)
+
+
+def render_variant(image, size, image_format):
+    variant = ImageOps.fit(image, size, Image.LANCZOS)
+    pil_format, options = IMAGE_FORMATS[image_format]
+    buffer = BytesIO()
+    variant.save(buffer, pil_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def build_image_variants(image_name):
+    with default_storage.open(image_name) as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image).convert('RGB')
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    variants = {}
+    for variant, size in IMAGE_VARIANT_SIZES.items():
+        variants[variant] = {}
+        for image_format in IMAGE_FORMATS:
+            name = default_storage.save(
+                f'{IMAGE_VARIANTS_DIR}/{stem}_{variant}.{image_format}',
+                render_variant(image, size, image_format)
+            )
+            variants[variant][image_format] = name
+    return variants
+
+
+def generate_image_variants(recipe_id, image_name):
+    variants = build_image_variants(image_name)
+    updated = Recipe.objects.filter(pk=recipe_id, image=image_name).update(
+        image_variants=variants, updated_at=timezone.now()
+    )
+    if updated:
+        bump_version(RECIPES_VERSION_KEY)
+    else:
+        delete_image_variants(variants)
+    return variants
+
+
+def run_image_task(recipe_id, image_name):
+    close_old_connections()
+    try:
+        generate_image_variants(recipe_id, image_name)
+    finally:
+        close_old_connections()
+
+
+def report_image_task(recipe_id, image_name, future):
+    exception = future.exception()
+    if exception is None:
+        metrics_store.increment(IMAGE_TASK_METRIC, IMAGE_TASK_DONE)
+        return
+    metrics_store.increment(IMAGE_TASK_METRIC, IMAGE_TASK_FAILED)
+    logger.error(
+        'Не удалось построить варианты изображения %s рецепта %s',
+        image_name, recipe_id, exc_info=exception,
+    )
+
+
+def submit_image_task(recipe_id, image_name):
+    future = executor.submit(run_image_task, recipe_id, image_name)
+    future.add_done_callback(
+        partial(report_image_task, recipe_id, image_name)
+    )
+    return future
+
+
+def schedule_image_variants(recipe):
+    recipe_id, image_name = recipe.pk, recipe.image.name
+    transaction.on_commit(lambda: submit_image_task(recipe_id, image_name))
+
+
+def delete_image_variants(variants):
+    for formats in variants.values():
+        for name in formats.values():
+            default_storage.delete(name)
+
+
+def delete_image_variants_on_commit(variants):
+    if variants:
+        transaction.on_commit(lambda: delete_image_variants(variants))
+
+
+def get_image_url(recipe, variant=None, request=None):
+    if not recipe.image:
+        return None
+    name = recipe.image_variants.get(variant, {}).get(DEFAULT_IMAGE_FORMAT)
+    url = default_storage.url(name) if name else recipe.image.url
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
@@ -0,0 +1,349 @@
+import random
+import time
+from collections import defaultdict
+from itertools import count
+
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from ...benchmarks import (API, PANTRY_SIZE, SAMPLE_SIZE, BenchmarkCommand,
+                           mean, sample_ids, summarize)
+from ...models import Cart, Favorite, Follow, Ingredient, Recipe, Tag, User
+from .generate_data import PASSWORD, WORDS
+
+ANONYMOUS = 'anonymous'
+AUTHENTICATED = 'authenticated'
+ADMIN = 'admin'
+RECIPE_IMAGE = (
+    'data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///'
+    'yH5BAEAAAAALAAAAAABAAEAAAIBRAA7'
+)
+INGREDIENTS_PER_RECIPE = 3
+
+
+def summarize_requests(samples):
+    statuses = defaultdict(int)
+    for sample in samples:
+        statuses[str(sample[2])] += 1
+    return summarize(
+        [sample[0] * 1000 for sample in samples],
+        queries_per_request=mean(sample[1] for sample in samples),
+        max_queries=max(sample[1] for sample in samples),
+        cache_hits=sum(sample[3] == 'HIT' for sample in samples),
+        statuses=dict(statuses),
+    )
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Прогоняет все эндпоинты API анонимно и от имени пользователя '
+        'и выводит перцентили времени ответа и число SQL-запросов в JSON'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Количество замеров на эндпоинт',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=3,
+            help='Количество прогревочных запросов на эндпоинт',
+        )
+        parser.add_argument(
+            '--email',
+            help='Пользователь для авторизованных запросов',
+        )
+        parser.add_argument(
+            '--password',
+            default=PASSWORD,
+            help='Пароль пользователя для проверки входа и смены пароля',
+        )
+        parser.add_argument(
+            '--writes',
+            action='store_true',
+            help='Замерять и запросы, которые меняют данные: избранное, '
+                 'корзину, подписки, рецепты с картинками, вход и пароль',
+        )
+
+    def run(self, options):
+        self.rng = random.Random(options['seed'])
+        self.numbers = count()
+        self.user = self.get_user(options['email'])
+        self.password = options['password']
+        self.writes = options['writes']
+        self.prepare_samples()
+        self.token = Token.objects.get_or_create(user=self.user)[0].key
+        self.clients = {
+            ANONYMOUS: APIClient(),
+            AUTHENTICATED: self.client_for(self.token),
+        }
+        admin = User.objects.filter(is_superuser=True, is_active=True).first()
+        if admin is not None:
+            self.clients[ADMIN] = self.client_for(
+                Token.objects.get_or_create(user=admin)[0].key
+            )
+        results = {}
+        for name, who, scenario in self.get_scenarios():
+            if who not in self.clients:
+                continue
+            self.samples = defaultdict(list)
+            client = self.clients[who]
+            for _ in range(options['warmup']):
+                scenario(client)
+            self.samples.clear()
+            for _ in range(options['requests']):
+                scenario(client)
+            for endpoint, samples in self.samples.items():
+                results[f'{endpoint} {who}'] = summarize_requests(samples)
+            self.stderr.write(f'{name} {who}: ok')
+        return {
+            'data': {
+                model._meta.model_name: model.objects.count()
+                for model in (User, Recipe, Ingredient, Tag, Favorite, Cart,
+                              Follow)
+            },
+            'endpoints': results,
+        }
+
+    @staticmethod
+    def get_user(email):
+        if email is not None:
+            user = User.objects.filter(email=email).first()
+            if user is None:
+                raise CommandError(f'Пользователь {email} не найден')
+            return user
+        user = User.objects.annotate(
+            subscriptions=Count('follower')
+        ).order_by('-subscriptions', 'id').first()
+        if user is None or not Recipe.objects.exists():
+            raise CommandError('Нет данных, сначала запустите generate_data')
+        return user
+
+    @staticmethod
+    def client_for(token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        return client
+
+    def prepare_samples(self):
+        self.recipes = sample_ids(Recipe.objects.all(), self.rng)
+        self.authors = sample_ids(
+            User.objects.filter(recipes_count__gt=0), self.rng
+        )
+        self.tags = list(Tag.objects.values_list('id', 'slug'))
+        self.ingredients = list(Ingredient.objects.values_list('id', 'name')[
+            :SAMPLE_SIZE
+        ])
+        self.free_recipes = {
+            model: sample_ids(
+                Recipe.objects.exclude(**{field: self.user}), self.rng
+            )
+            for model, field in (
+                (Favorite, 'favorite__user'),
+                (Cart, 'recipes_cart__user'),
+            )
+        }
+        self.free_authors = sample_ids(
+            User.objects.exclude(pk=self.user.pk).exclude(
+                following__follower=self.user
+            ),
+            self.rng,
+        )
+
+    def choice(self, items):
+        return self.rng.choice(items)
+
+    def request(self, endpoint, client, method, path, data=None):
+        extra = {} if method == 'get' else {'format': 'json'}
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = getattr(client, method)(API + path, data, **extra)
+            elapsed = time.perf_counter() - start
+        self.samples[f'{method.upper()} {endpoint}'].append((
+            elapsed,
+            len(queries),
+            response.status_code,
+            response.get('X-Cache'),
+        ))
+        return response
+
+    def get(self, endpoint, path=None, params=None):
+        return lambda client: self.request(
+            endpoint,
+            client,
+            'get',
+            path() if callable(path) else path or endpoint,
+            params() if callable(params) else params,
+        )
+
+    def get_scenarios(self):
+        reads = (
+            ('ingredients', self.get('ingredients/')),
+            ('ingredients?name', self.get(
+                'ingredients/?name',
+                'ingredients/',
+                lambda: {'name': self.choice(self.ingredients)[1][:3]},
+            )),
+            ('ingredients/{id}', self.get(
+                'ingredients/{id}/',
+                lambda: f'ingredients/{self.choice(self.ingredients)[0]}/',
+            )),
+            ('tags', self.get('tags/')),
+            ('tags/{id}', self.get(
+                'tags/{id}/',
+                lambda: f'tags/{self.choice(self.tags)[0]}/',
+            )),
+            ('users', self.get('users/')),
+            ('users/{id}', self.get(
+                'users/{id}/',
+                lambda: f'users/{self.choice(self.authors)}/',
+            )),
+            ('recipes', self.get(
+                'recipes/', params=lambda: {'page': self.rng.randint(1, 10)},
+            )),
+            ('recipes?tags', self.get(
+                'recipes/?tags',
+                'recipes/',
+                lambda: {'tags': self.choice(self.tags)[1]},
+            )),
+            ('recipes?author', self.get(
+                'recipes/?author',
+                'recipes/',
+                lambda: {'author': self.choice(self.authors)},
+            )),
+            ('recipes?search', self.get(
+                'recipes/?search',
+                'recipes/',
+                lambda: {'search': self.choice(WORDS)},
+            )),
+            ('recipes/{id}', self.get(
+                'recipes/{id}/',
+                lambda: f'recipes/{self.choice(self.recipes)}/',
+            )),
+            ('recipes/cookable', self.get(
+                'recipes/cookable/',
+                params=lambda: {'ingredients': [
+                    ingredient for ingredient, _ in self.rng.sample(
+                        self.ingredients,
+                        min(PANTRY_SIZE, len(self.ingredients)),
+                    )
+                ]},
+            )),
+            ('recipes/{id}/similar', self.get(
+                'recipes/{id}/similar/',
+                lambda: f'recipes/{self.choice(self.recipes)}/similar/',
+            )),
+        )
+        for name, scenario in reads:
+            yield name, ANONYMOUS, scenario
+            yield name, AUTHENTICATED, scenario
+        for name, scenario in (
+            ('users/me', self.get('users/me/')),
+            ('users/subscriptions', self.get(
+                'users/subscriptions/', params={'recipes_limit': 3}
+            )),
+            ('recipes?is_favorited', self.get(
+                'recipes/?is_favorited', 'recipes/', {'is_favorited': 1}
+            )),
+            ('recipes?is_in_shopping_cart', self.get(
+                'recipes/?is_in_shopping_cart',
+                'recipes/',
+                {'is_in_shopping_cart': 1},
+            )),
+            ('recipes/download_shopping_cart', self.get(
+                'recipes/download_shopping_cart/'
+            )),
+            ('recipes/shopping_list', self.get('recipes/shopping_list/')),
+            ('recipes/feed', self.get('recipes/feed/')),
+        ):
+            yield name, AUTHENTICATED, scenario
+        if self.writes:
+            yield from self.get_write_scenarios()
+        yield 'cache/stats', ADMIN, self.get('cache/stats/')
+
+    def get_write_scenarios(self):
+        for name, scenario in (
+            ('recipes/{id}/favorite', lambda client: self.toggle(
+                client, 'recipes/{id}/favorite/',
+                self.free_recipes[Favorite],
+            )),
+            ('recipes/{id}/shopping_cart', lambda client: self.toggle(
+                client, 'recipes/{id}/shopping_cart/',
+                self.free_recipes[Cart],
+            )),
+            ('users/{id}/subscribe', lambda client: self.toggle(
+                client, 'users/{id}/subscribe/', self.free_authors
+            )),
+            ('recipes', self.write_recipe),
+            ('auth/token', self.login_logout),
+            ('users/set_password', self.set_password),
+        ):
+            yield name, AUTHENTICATED, scenario
+
+    def toggle(self, client, endpoint, ids):
+        if not ids:
+            return
+        path = endpoint.format(id=self.choice(ids))
+        self.request(endpoint, client, 'post', path)
+        self.request(endpoint, client, 'delete', path)
+
+    def recipe_data(self):
+        return {
+            'name': f'benchmark {next(self.numbers)} {time.time_ns()}'[:50],
+            'text': ' '.join(self.rng.choices(WORDS, k=20)),
+            'cooking_time': self.rng.randint(1, 120),
+            'image': RECIPE_IMAGE,
+            'tags': [self.choice(self.tags)[0]],
+            'ingredients': [
+                {'id': ingredient, 'amount': self.rng.randint(1, 500)}
+                for ingredient, _ in self.rng.sample(
+                    self.ingredients, INGREDIENTS_PER_RECIPE
+                )
+            ],
+        }
+
+    def write_recipe(self, client):
+        response = self.request(
+            'recipes/', client, 'post', 'recipes/', self.recipe_data()
+        )
+        if response.status_code != 201:
+            return
+        path = f'recipes/{response.data["id"]}/'
+        self.request(
+            'recipes/{id}/', client, 'patch', path, self.recipe_data()
+        )
+        self.request('recipes/{id}/', client, 'delete', path)
+
+    def login_logout(self, client):
+        response = self.request(
+            'auth/token/login/', APIClient(), 'post', 'auth/token/login/',
+            {'email': self.user.email, 'password': self.password},
+        )
+        if response.status_code != 200:
+            return
+        session = APIClient()
+        session.credentials(
+            HTTP_AUTHORIZATION=f'Token {response.data["auth_token"]}'
+        )
+        self.request(
+            'auth/token/logout/', session, 'post', 'auth/token/logout/'
+        )
+        Token.objects.get_or_create(user=self.user, key=self.token)
+
+    def set_password(self, client):
+        self.request(
+            'users/set_password/', client, 'post', 'users/set_password/',
+            {
+                'current_password': self.password,
+                'new_password': self.password,
+            },
+        )
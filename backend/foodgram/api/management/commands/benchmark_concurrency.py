@@ -0,0 +1,162 @@
+import http.client
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from django.core.management.base import CommandError
+from django.db.models import Count
+from rest_framework.authtoken.models import Token
+
+from ...benchmarks import API, BenchmarkCommand, sample_ids, summarize
+from ...models import Ingredient, Recipe, Tag, User
+
+CONCURRENCY = (1, 8, 32)
+PAGES = 10
+TIMEOUT = 60
+
+
+def parse_target(value):
+    name, _, url = value.partition('=')
+    parsed = urlparse(url)
+    if not name or parsed.scheme != 'http' or not parsed.netloc:
+        raise CommandError(
+            f'Цель {value} должна иметь вид имя=http://хост:порт'
+        )
+    return name, parsed.netloc
+
+
+class Worker:
+
+    def __init__(self, host, headers):
+        self.host = host
+        self.headers = headers
+        self.local = threading.local()
+
+    def get_connection(self):
+        if not hasattr(self.local, 'connection'):
+            self.local.connection = http.client.HTTPConnection(
+                self.host, timeout=TIMEOUT
+            )
+        return self.local.connection
+
+    def request(self, path):
+        start = time.perf_counter()
+        try:
+            connection = self.get_connection()
+            connection.request('GET', path, headers=self.headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.local.__dict__.pop('connection', None)
+            status = 0
+        return time.perf_counter() - start, status
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Нагрузочный тест эндпоинтов чтения: одновременно шлёт запросы '
+        'к запущенным серверам (например, gunicorn с синхронными '
+        'воркерами и ASGI-серверу с ASYNC_READ_VIEWS=True) и сравнивает '
+        'пропускную способность и перцентили задержки в JSON'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--target',
+            action='append',
+            required=True,
+            help='Сервер в виде имя=http://хост:порт, можно несколько',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            nargs='+',
+            default=CONCURRENCY,
+            help='Количество одновременных клиентов',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Количество запросов на уровень нагрузки',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=50,
+            help='Количество прогревочных запросов',
+        )
+        parser.add_argument(
+            '--anonymous',
+            action='store_true',
+            help='Слать запросы без токена (с кэшем анонимных ответов)',
+        )
+
+    def run(self, options):
+        targets = [parse_target(value) for value in options['target']]
+        rng = random.Random(options['seed'])
+        paths = self.get_paths(rng, options['anonymous'])
+        headers = {}
+        if not options['anonymous']:
+            user = User.objects.filter(is_active=True).annotate(
+                subscriptions=Count('follower')
+            ).order_by('-subscriptions', 'id').first()
+            token, _ = Token.objects.get_or_create(user=user)
+            headers['Authorization'] = f'Token {token.key}'
+        results = {}
+        for name, host in targets:
+            worker = Worker(host, headers)
+            with ThreadPoolExecutor(max(options['concurrency'])) as pool:
+                list(pool.map(worker.request, (
+                    rng.choice(paths) for _ in range(options['warmup'])
+                )))
+            results[name] = {}
+            for concurrency in options['concurrency']:
+                requests = [
+                    rng.choice(paths) for _ in range(options['requests'])
+                ]
+                with ThreadPoolExecutor(concurrency) as pool:
+                    start = time.perf_counter()
+                    samples = list(pool.map(worker.request, requests))
+                    elapsed = time.perf_counter() - start
+                results[name][concurrency] = self.summarize(samples, elapsed)
+                self.stderr.write(f'{name} x{concurrency}: ok')
+        return {
+            'anonymous': options['anonymous'],
+            'paths': len(paths),
+            'targets': dict(targets),
+            'load': results,
+        }
+
+    @staticmethod
+    def get_paths(rng, anonymous):
+        recipes = sample_ids(Recipe.objects.all(), rng)
+        if not recipes:
+            raise CommandError('Нет данных, сначала запустите generate_data')
+        paths = [
+            *(f'{API}recipes/?page={page}' for page in range(1, PAGES + 1)),
+            f'{API}tags/',
+            *(f'{API}tags/{tag}/' for tag in Tag.objects.values_list(
+                'id', flat=True
+            )),
+            *(f'{API}recipes/{recipe}/' for recipe in recipes),
+            *(
+                f'{API}ingredients/{ingredient}/'
+                for ingredient in sample_ids(Ingredient.objects.all(), rng)
+            ),
+        ]
+        if not anonymous:
+            paths.append(f'{API}users/subscriptions/?recipes_limit=3')
+        return paths
+
+    @staticmethod
+    def summarize(samples, elapsed):
+        return summarize(
+            [sample[0] * 1000 for sample in samples],
+            requests_per_second=round(len(samples) / elapsed, 1),
+            errors=sum(not 200 <= sample[1] < 300 for sample in samples),
+        )
@@ -0,0 +1,106 @@
+import random
+import time
+
+from django.core.management.base import CommandError
+from django.db import connection, reset_queries
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+
+from ...benchmarks import (PANTRY_SIZE, BenchmarkCommand, mean, sample_ids,
+                           summarize)
+from ...cookable import COOKABLE_LIMIT, cookable_index
+from ...models import IngredientQuantity, Recipe
+
+
+def array_bytes(values):
+    return values.itemsize * len(values)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Замеряет время сборки индекса «что приготовить» и задержку '
+        'поиска рецептов по имеющимся ингредиентам и выводит JSON'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=200,
+            help='Количество замеров поиска',
+        )
+        parser.add_argument(
+            '--ingredients',
+            type=int,
+            default=PANTRY_SIZE,
+            help='Сколько ингредиентов в одном запросе',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=COOKABLE_LIMIT,
+            help='Сколько рецептов запрашивать',
+        )
+
+    def run(self, options):
+        recipes = Recipe.objects.count()
+        if not recipes:
+            raise CommandError('Нет данных, сначала запустите generate_data')
+        rng = random.Random(options['seed'])
+        start = time.perf_counter()
+        cookable_index.build()
+        elapsed = time.perf_counter() - start
+        self.stderr.write(f'build: {elapsed:.1f} s')
+        indexed, offsets, ingredients, _, postings = cookable_index.base
+        lists = [
+            entries for ingredient_lists in postings.values()
+            for _, _, entries in ingredient_lists
+        ]
+        cookable_index.refresh()
+        popular, weights = zip(*IngredientQuantity.objects.values_list(
+            'ingredient'
+        ).annotate(count=Count('id')).values_list('ingredient', 'count'))
+        pantries = []
+        for recipe in sample_ids(
+            Recipe.objects.all(), rng, options['queries']
+        ):
+            pantry = set(IngredientQuantity.objects.filter(
+                recipe=recipe
+            ).values_list('ingredient', flat=True))
+            while len(pantry) < min(options['ingredients'], len(popular)):
+                pantry.update(rng.choices(popular, weights))
+            pantries.append(list(pantry))
+        samples = []
+        for pantry in pantries:
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                found = cookable_index.search(pantry, options['limit'])
+                duration = time.perf_counter() - start
+            samples.append((
+                duration * 1000,
+                len(queries),
+                found[-1][1] if found else 0,
+            ))
+        return {
+            'recipes': recipes,
+            'build': {
+                'seconds': round(elapsed, 3),
+                'recipes_per_second': round(recipes / elapsed),
+                'indexed_recipes': len(indexed),
+                'postings': len(ingredients),
+                'posting_lists': len(lists),
+                'array_megabytes': round(sum(map(array_bytes, (
+                    indexed, offsets, ingredients, *lists
+                ))) / 2 ** 20, 1),
+            },
+            'query': summarize(
+                [sample[0] for sample in samples],
+                ingredients=options['ingredients'],
+                queries_per_request=mean(sample[1] for sample in samples),
+                mean_last_coverage=mean(
+                    (sample[2] for sample in samples), 3
+                ),
+            ),
+        }
@@ -0,0 +1,102 @@
+import random
+import time
+
+from django.core.management.base import CommandError
+
+from ...benchmarks import BenchmarkCommand, mean, summarize
+from ...models import Ingredient
+from ...search import (MIN_FUZZY_QUERY_LENGTH, MIN_SUBSTRING_QUERY_LENGTH,
+                       ingredient_index)
+
+MAX_PREFIX_LENGTH = 6
+PREFIX = 'prefix'
+SUBSTRING = 'substring'
+TYPO = 'typo'
+QUERY_KINDS = (PREFIX, SUBSTRING, TYPO)
+
+
+def make_query(name, kind, rng):
+    name = name.lower()
+    if kind == SUBSTRING and len(name) > MIN_SUBSTRING_QUERY_LENGTH:
+        start = rng.randrange(1, len(name) - MIN_SUBSTRING_QUERY_LENGTH + 1)
+        return name[start:start + rng.randint(
+            MIN_SUBSTRING_QUERY_LENGTH, MAX_PREFIX_LENGTH
+        )]
+    if kind == TYPO and len(name) >= MIN_FUZZY_QUERY_LENGTH:
+        query = list(name[:rng.randint(
+            MIN_FUZZY_QUERY_LENGTH, max(len(name), MIN_FUZZY_QUERY_LENGTH)
+        )])
+        query[rng.randrange(1, len(query))] = rng.choice('аеиоуя')
+        return ''.join(query)
+    return name[:rng.randint(1, MAX_PREFIX_LENGTH)]
+
+
+def filter_lookup(query):
+    return list(Ingredient.objects.filter(
+        name__istartswith=query
+    ).values_list('id', 'name', 'measurement_unit'))
+
+
+def index_lookup(query):
+    return ingredient_index.rows(ingredient_index.search(query))
+
+
+def summarize_lookups(samples):
+    return summarize(
+        [sample[0] for sample in samples],
+        4,
+        mean_results=mean(sample[1] for sample in samples),
+        empty_results=sum(not sample[1] for sample in samples),
+    )
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Сравнивает поиск ингредиентов через индекс в памяти с фильтром '
+        'по началу названия и выводит задержки в JSON'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=1000,
+            help='Количество запросов каждого вида',
+        )
+
+    def run(self, options):
+        names = list(Ingredient.objects.values_list('name', flat=True))
+        if not names:
+            raise CommandError(
+                'Нет ингредиентов, сначала запустите load_ingredients'
+            )
+        rng = random.Random(options['seed'])
+        ingredient_index.version = None
+        start = time.perf_counter()
+        ingredient_index.refresh()
+        build = time.perf_counter() - start
+        results = {}
+        for kind in QUERY_KINDS:
+            queries = [
+                make_query(rng.choice(names), kind, rng)
+                for _ in range(options['queries'])
+            ]
+            for method, lookup in (
+                ('filter', filter_lookup),
+                ('index', index_lookup),
+            ):
+                samples = []
+                for query in queries:
+                    start = time.perf_counter()
+                    found = lookup(query)
+                    elapsed = time.perf_counter() - start
+                    samples.append((elapsed * 1000, len(found)))
+                results.setdefault(kind, {})[method] = summarize_lookups(
+                    samples
+                )
+        return {
+            'ingredients': len(names),
+            'build_ms': round(build * 1000, 3),
+            'lookups': results,
+        }
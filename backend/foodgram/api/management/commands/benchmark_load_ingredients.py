@@ -0,0 +1,130 @@
+import csv
+import io
+import json
+import os
+import random
+import tempfile
+import time
+
+from django.core.management import call_command
+from django.db import transaction
+
+from ...benchmarks import BenchmarkCommand
+from ...models import Ingredient
+from .explain_queries import Rollback
+from .generate_data import UNITS, WORDS
+from .load_ingredients import CSV_HEADER, FORMATS
+
+ROWS = 1000000
+PASSES = (
+    ('insert', ()),
+    ('rerun', ()),
+    ('update', ('--update',)),
+)
+
+
+def make_rows(count, rng):
+    for number in range(count):
+        yield (
+            f'{rng.choice(WORDS)} benchmark {number}', rng.choice(UNITS)
+        )
+
+
+def write_file(path, file_format, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        if file_format == 'csv':
+            writer = csv.writer(file)
+            writer.writerow(CSV_HEADER)
+            writer.writerows(rows)
+            return
+        items = (
+            json.dumps(dict(zip(CSV_HEADER, row)), ensure_ascii=False)
+            for row in rows
+        )
+        if file_format == 'jsonl':
+            file.writelines(f'{item}\n' for item in items)
+            return
+        file.write('[\n')
+        for number, item in enumerate(items):
+            file.write(f',\n{item}' if number else item)
+        file.write('\n]\n')
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Создаёт синтетический файл ингредиентов и замеряет скорость '
+        'load_ingredients: первую загрузку, повторный запуск и обновление; '
+        'все изменения откатываются'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=ROWS,
+            help='Количество строк в синтетическом файле',
+        )
+        parser.add_argument(
+            '--formats',
+            nargs='+',
+            choices=FORMATS,
+            default=FORMATS,
+            help='Форматы файлов для замера',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Размер пачки для load_ingredients',
+        )
+
+    def run(self, options):
+        existing = Ingredient.objects.count()
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for file_format in options['formats']:
+                path = os.path.join(directory, f'ingredients.{file_format}')
+                start = time.perf_counter()
+                write_file(path, file_format, make_rows(
+                    options['rows'], random.Random(options['seed'])
+                ))
+                results[file_format] = {
+                    'file_megabytes': round(
+                        os.path.getsize(path) / 2 ** 20, 1
+                    ),
+                    'generate_seconds': round(
+                        time.perf_counter() - start, 3
+                    ),
+                    **self.measure(path, options),
+                }
+                os.remove(path)
+                self.stderr.write(f'{file_format}: ok')
+        return {
+            'existing_ingredients': existing,
+            'rows': options['rows'],
+            'batch_size': options['batch_size'],
+            'loads': results,
+        }
+
+    @staticmethod
+    def measure(path, options):
+        result = {}
+        try:
+            with transaction.atomic():
+                for name, arguments in PASSES:
+                    start = time.perf_counter()
+                    call_command(
+                        'load_ingredients', path, *arguments,
+                        batch_size=options['batch_size'], stdout=io.StringIO()
+                    )
+                    elapsed = time.perf_counter() - start
+                    result[name] = {
+                        'seconds': round(elapsed, 3),
+                        'rows_per_second': round(options['rows'] / elapsed),
+                        'ingredients': Ingredient.objects.count(),
+                    }
+                raise Rollback
+        except Rollback:
+            pass
+        return result
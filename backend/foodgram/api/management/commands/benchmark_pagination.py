@@ -0,0 +1,109 @@
+import math
+import time
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.pagination import Cursor
+from rest_framework.test import APIClient
+
+from ...benchmarks import API, BenchmarkCommand, summarize
+from ...models import Recipe, User
+from ...pagination import (COUNT_ESTIMATE, COUNT_EXACT, COUNT_NONE, PAGE_SIZE,
+                           KeysetPagination)
+
+RECIPES_PATH = f'{API}recipes/'
+DEEP_PAGE = 5000
+
+
+def get_cursor(position):
+    paginator = KeysetPagination()
+    paginator.base_url = f'http://testserver{RECIPES_PATH}'
+    url = paginator.encode_cursor(
+        Cursor(offset=0, reverse=False, position=str(position))
+    )
+    return parse_qs(urlparse(url).query)[paginator.cursor_query_param][0]
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Сравнивает время первой и глубокой страницы списка рецептов '
+        'при постраничной пагинации с разными режимами подсчёта и при '
+        'пагинации по курсору и выводит JSON'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--page',
+            type=int,
+            default=DEEP_PAGE,
+            help='Номер глубокой страницы',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=PAGE_SIZE,
+            help='Размер страницы',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=20,
+            help='Количество замеров на вариант',
+        )
+
+    def run(self, options):
+        recipes = Recipe.objects.count()
+        user = User.objects.order_by('id').first()
+        if not recipes or user is None:
+            raise CommandError('Нет данных, сначала запустите generate_data')
+        limit = options['limit']
+        page = min(options['page'], math.ceil(recipes / limit))
+        ids = Recipe.objects.order_by('-id').values_list('id', flat=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.requests = options['requests']
+        results = {}
+        for number in dict.fromkeys((1, page)):
+            for count_mode in (COUNT_EXACT, COUNT_ESTIMATE, COUNT_NONE):
+                name = f'page {number} count={count_mode}'
+                results[name], _ = self.measure({
+                    'page': number, 'limit': limit, 'count': count_mode,
+                })
+            params = {'limit': limit, 'cursor': ''}
+            if number > 1:
+                params['cursor'] = get_cursor(
+                    ids[(number - 1) * limit - 1]
+                )
+            name = f'page {number} cursor'
+            results[name], found = self.measure(params)
+            results[name]['expected_results'] = found == list(
+                ids[(number - 1) * limit:number * limit]
+            )
+        return {
+            'recipes': recipes,
+            'limit': limit,
+            'deep_page': page,
+            'pages': results,
+        }
+
+    def measure(self, params):
+        samples = []
+        for _ in range(self.requests):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = self.client.get(RECIPES_PATH, params)
+                elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                raise CommandError(
+                    f'{RECIPES_PATH} {params}: ответ {response.status_code}'
+                )
+            samples.append((elapsed * 1000, len(queries)))
+        return summarize(
+            [sample[0] for sample in samples],
+            max_queries=max(sample[1] for sample in samples),
+        ), [
+            recipe['id'] for recipe in response.data['results']
+        ]
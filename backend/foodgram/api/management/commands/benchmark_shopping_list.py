@@ -0,0 +1,121 @@
+import random
+import time
+
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ...benchmarks import API, BenchmarkCommand, sample_ids, summarize
+from ...models import Cart, Recipe, ShoppingListItem, User
+from ...renderers import (ShoppingListCSVRenderer, ShoppingListJSONRenderer,
+                          ShoppingListTextRenderer)
+from ...shopping import refresh_shopping_lists
+from .explain_queries import Rollback
+
+CART_SIZES = (10, 100, 1000)
+FORMATS = tuple(
+    renderer.format for renderer in (
+        ShoppingListTextRenderer,
+        ShoppingListCSVRenderer,
+        ShoppingListJSONRenderer,
+    )
+)
+DOWNLOAD_PATH = f'{API}recipes/download_shopping_cart/'
+SHOPPING_LIST_PATH = f'{API}recipes/shopping_list/'
+
+
+def summarize_downloads(samples):
+    return summarize(
+        [sample[0] for sample in samples],
+        max_queries=max(sample[1] for sample in samples),
+        bytes=max(sample[2] for sample in samples),
+    )
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Замеряет выгрузку списка покупок для корзин разного размера '
+        'во всех форматах и выводит JSON; корзины создаются во временной '
+        'транзакции и откатываются'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=CART_SIZES,
+            help='Размеры корзин в рецептах',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=20,
+            help='Количество замеров на формат',
+        )
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        recipes = sample_ids(Recipe.objects.all(), rng, max(options['sizes']))
+        if not recipes:
+            raise CommandError('Нет данных, сначала запустите generate_data')
+        results = {}
+        try:
+            with transaction.atomic():
+                user = User.objects.create(
+                    email='shopping-benchmark@example.com',
+                    username='shopping-benchmark',
+                    first_name='benchmark',
+                    last_name='benchmark',
+                )
+                client = APIClient()
+                client.force_authenticate(user)
+                for size in options['sizes']:
+                    results[size] = self.measure(
+                        client, user, recipes[:size], options['requests']
+                    )
+                    self.stderr.write(f'cart {size}: ok')
+                raise Rollback
+        except Rollback:
+            pass
+        return {'carts': results}
+
+    def measure(self, client, user, recipes, requests):
+        Cart.objects.filter(user=user).delete()
+        Cart.objects.bulk_create(
+            Cart(user=user, recipe_id=recipe) for recipe in recipes
+        )
+        start = time.perf_counter()
+        refresh_shopping_lists((user.id,))
+        refreshed = time.perf_counter() - start
+        result = {
+            'recipes': len(recipes),
+            'ingredients': ShoppingListItem.objects.filter(user=user).count(),
+            'refresh_ms': round(refreshed * 1000, 3),
+        }
+        for name, path, params in (
+            *(
+                (f'download {value}', DOWNLOAD_PATH, {'format': value})
+                for value in FORMATS
+            ),
+            ('shopping_list', SHOPPING_LIST_PATH, None),
+        ):
+            samples = []
+            for _ in range(requests):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = client.get(path, params)
+                    body = b''.join(
+                        response.streaming_content if response.streaming
+                        else (response.content,)
+                    )
+                    elapsed = time.perf_counter() - start
+                if response.status_code != 200:
+                    raise CommandError(
+                        f'{path}: ответ {response.status_code}'
+                    )
+                samples.append((elapsed * 1000, len(queries), len(body)))
+            result[name] = summarize_downloads(samples)
+        return result
@@ -0,0 +1,81 @@
+import random
+import time
+
+from django.core.management.base import CommandError
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+
+from ...benchmarks import BenchmarkCommand, mean, sample_ids, summarize
+from ...models import Recipe, RecipeSignatureBand
+from ...similarity import (BATCH_SIZE, SIMILAR_LIMIT, get_similar_recipes,
+                           update_similarity_index)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Замеряет время сборки индекса похожих рецептов и задержку '
+        'запросов к нему и выводит результаты в JSON'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=200,
+            help='Количество замеров запроса похожих рецептов',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=SIMILAR_LIMIT,
+            help='Сколько похожих рецептов запрашивать',
+        )
+        parser.add_argument(
+            '--skip-build',
+            action='store_true',
+            help='Не пересобирать индекс перед замерами',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def run(self, options):
+        recipes = Recipe.objects.count()
+        if not recipes:
+            raise CommandError('Нет данных, сначала запустите generate_data')
+        build = None
+        if not options['skip_build']:
+            start = time.perf_counter()
+            with transaction.atomic():
+                written = update_similarity_index(
+                    batch_size=options['batch_size']
+                )
+            elapsed = time.perf_counter() - start
+            build = {
+                'seconds': round(elapsed, 3),
+                'recipes_per_second': round(recipes / elapsed),
+                'bands': written,
+            }
+            self.stderr.write(f'build: {elapsed:.1f} s')
+        samples = []
+        for recipe in sample_ids(
+            Recipe.objects.all(),
+            random.Random(options['seed']),
+            options['queries'],
+        ):
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                similar = get_similar_recipes(recipe, options['limit'])
+                elapsed = time.perf_counter() - start
+            samples.append((elapsed * 1000, len(queries), len(similar)))
+        return {
+            'recipes': recipes,
+            'bands': RecipeSignatureBand.objects.count(),
+            'build': build,
+            'query': summarize(
+                [sample[0] for sample in samples],
+                queries_per_request=mean(sample[1] for sample in samples),
+                mean_results=mean(sample[2] for sample in samples),
+                empty_results=sum(not sample[2] for sample in samples),
+            ),
+        }
@@ -0,0 +1,113 @@
+import random
+import time
+
+from django.core.management.base import CommandError
+from django.db.models import Count
+
+from ...benchmarks import BenchmarkCommand, mean, summarize
+from ...filters import TAGS_MODE_ALL, TAGS_MODE_ANY, RecipeFilter
+from ...models import Recipe, Tag
+from ...pagination import PAGE_SIZE
+
+TAGS = 20
+TAGS_PER_QUERY = (1, 3, 5)
+EXISTS = 'exists'
+JOIN = 'join'
+
+
+def filter_exists(slugs, mode):
+    return RecipeFilter(
+        {'tags': slugs, 'tags_mode': mode}, queryset=Recipe.objects.all()
+    ).qs
+
+
+def filter_join(slugs, mode):
+    queryset = Recipe.objects.filter(tags__slug__in=slugs)
+    if mode == TAGS_MODE_ALL:
+        return queryset.annotate(
+            matched_tags=Count('tags')
+        ).filter(matched_tags=len(slugs))
+    return queryset.distinct()
+
+
+METHODS = {EXISTS: filter_exists, JOIN: filter_join}
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Сравнивает фильтрацию рецептов по тегам через EXISTS с '
+        'фильтрацией через JOIN и DISTINCT в режимах any и all и '
+        'выводит JSON'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--tags',
+            type=int,
+            default=TAGS,
+            help='Сколько тегов должно быть в базе',
+        )
+        parser.add_argument(
+            '--per-query',
+            type=int,
+            nargs='+',
+            default=TAGS_PER_QUERY,
+            help='Сколько тегов передавать в одном запросе',
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=10,
+            help='Количество замеров на вариант',
+        )
+        parser.add_argument(
+            '--methods',
+            nargs='+',
+            choices=tuple(METHODS),
+            default=tuple(METHODS),
+            help='Какие способы фильтрации замерять',
+        )
+
+    def run(self, options):
+        slugs = list(Tag.objects.values_list('slug', flat=True))
+        if len(slugs) < options['tags']:
+            raise CommandError(
+                f'В базе {len(slugs)} тегов, нужно {options["tags"]}: '
+                'запустите generate_data с параметром --tags'
+            )
+        rng = random.Random(options['seed'])
+        results = {}
+        for per_query in options['per_query']:
+            queries = [
+                rng.sample(slugs, min(per_query, len(slugs)))
+                for _ in range(options['queries'])
+            ]
+            for mode in (TAGS_MODE_ANY, TAGS_MODE_ALL):
+                name = f'{per_query} tags {mode}'
+                results[name] = {}
+                for method in options['methods']:
+                    results[name][method] = self.measure(
+                        METHODS[method], queries, mode
+                    )
+                self.stderr.write(f'{name}: ok')
+        return {
+            'recipes': Recipe.objects.count(),
+            'tags': len(slugs),
+            'tag_links': Recipe.tags.through.objects.count(),
+            'filters': results,
+        }
+
+    @staticmethod
+    def measure(method, queries, mode):
+        samples = []
+        for slugs in queries:
+            start = time.perf_counter()
+            queryset = method(slugs, mode)
+            total = queryset.count()
+            list(queryset.values_list('id', flat=True)[:PAGE_SIZE])
+            samples.append(((time.perf_counter() - start) * 1000, total))
+        return summarize(
+            [sample[0] for sample in samples],
+            mean_count=mean((sample[1] for sample in samples), None),
+        )
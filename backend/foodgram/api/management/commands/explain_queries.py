@@ -0,0 +1,228 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models.query import RawQuerySet
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from ...cache import MEMBERSHIP_QUERIES
+from ...cookable import get_changed_recipes, get_cookable_queryset
+from ...feed import fill_timelines, get_timeline
+from ...filters import TAGS_MODE_ALL
+from ...models import (Cart, Favorite, Follow, Ingredient, IngredientQuantity,
+                       Recipe, RecipeSignatureBand, Tag, User, get_text_hash)
+from ...pagination import PAGE_SIZE
+from ...shopping import get_shopping_list, refresh_shopping_lists
+from ...similarity import get_bucket_recipes, update_similarity_index
+from ...views import RecipeViewSet, UserViewSet
+from .generate_data import create_ids
+
+SEQUENTIAL_SCANS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'SCAN (\w+)\b(?! USING| VIRTUAL TABLE)'),
+}
+DERIVED_TABLES = re.compile(r'CO-ROUTINE (\w+)')
+USERS_PER_RECIPES = 20
+INGREDIENTS_PER_RECIPE = 5
+TAGS_PER_QUERY = 2
+SUBSCRIPTION_RECIPES_LIMIT = 3
+
+
+class Rollback(Exception):
+    pass
+
+
+def get_view(viewset, action, user, params=None):
+    request = APIRequestFactory().get('/', params)
+    force_authenticate(request, user)
+    view = viewset(
+        action=action, action_map={'get': action}, args=(), kwargs={},
+        format_kwarg=None,
+    )
+    view.request = view.initialize_request(request)
+    return view
+
+
+def get_list_queryset(viewset, user, params=None):
+    view = get_view(viewset, 'list', user, params)
+    return view.filter_queryset(view.get_queryset())[:PAGE_SIZE]
+
+
+def get_queries(user, recipe):
+    band = RecipeSignatureBand.objects.filter(recipe=recipe).values_list(
+        'band', 'bucket'
+    ).first() or (0, 0)
+    tags = list(recipe.tags.values_list('slug', flat=True)) or list(
+        Tag.objects.values_list('slug', flat=True)[:TAGS_PER_QUERY]
+    )
+    ingredients = list(IngredientQuantity.objects.filter(
+        recipe=recipe
+    ).values_list('ingredient', flat=True))
+    subscriptions = get_view(
+        UserViewSet, 'subscriptions', user
+    ).get_subscriptions()
+    return {
+        **{
+            f'recipes{name}': get_list_queryset(RecipeViewSet, user, params)
+            for name, params in (
+                ('', None),
+                ('?author', {'author': user.id}),
+                ('?tags', {'tags': tags[:1]}),
+                ('?tags&tags_mode=all', {
+                    'tags': tags[:TAGS_PER_QUERY], 'tags_mode': TAGS_MODE_ALL
+                }),
+                ('?is_favorited', {'is_favorited': 1}),
+                ('?is_in_shopping_cart', {'is_in_shopping_cart': 1}),
+                ('?search', {'search': recipe.name.split()[0]}),
+            )
+        },
+        'recipes/{id}': get_view(
+            RecipeViewSet, 'retrieve', user
+        ).get_queryset().filter(pk=recipe.pk),
+        'recipes/{id}/tags': Tag.objects.filter(recipe=recipe),
+        'recipes/{id}/ingredients': IngredientQuantity.objects.filter(
+            recipe=recipe
+        ).select_related('ingredient'),
+        'recipes/download_shopping_cart': get_shopping_list(user),
+        'recipes/feed': get_timeline(user)[:PAGE_SIZE],
+        'recipes/{id}/similar': get_bucket_recipes(*band),
+        'recipes/cookable': get_cookable_queryset(ingredients)[:PAGE_SIZE],
+        'recipes/cookable:sync': get_changed_recipes(timezone.now()),
+        'users/subscriptions': subscriptions[:PAGE_SIZE],
+        'users/subscriptions:recipes': Recipe.objects.first_per_author(
+            subscriptions[:PAGE_SIZE], SUBSCRIPTION_RECIPES_LIMIT
+        ),
+        **{
+            f'memberships:{kind}': query(user.id)
+            for kind, query in MEMBERSHIP_QUERIES.items()
+        },
+    }
+
+
+def explain(queryset):
+    if not isinstance(queryset, RawQuerySet):
+        return queryset.explain()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{connection.ops.explain_query_prefix()} {queryset.raw_query}',
+            queryset.params,
+        )
+        return '\n'.join(' '.join(map(str, row)) for row in cursor.fetchall())
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN для основных запросов эндпоинтов '
+        'и отмечает последовательные сканирования'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipes',
+            type=int,
+            default=0,
+            help='Сгенерировать столько рецептов на время проверки',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SEQUENTIAL_SCANS:
+            raise CommandError(
+                f'EXPLAIN не поддерживается для {connection.vendor}'
+            )
+        try:
+            with transaction.atomic():
+                if options['recipes']:
+                    self.generate(options['recipes'])
+                scans = self.audit()
+                raise Rollback
+        except Rollback:
+            pass
+        if scans:
+            self.stdout.write(self.style.WARNING(
+                f'Последовательных сканирований: {scans}'
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            'Последовательных сканирований нет'
+        ))
+
+    def audit(self):
+        user = User.objects.filter(recipes__isnull=False).first()
+        recipe = Recipe.objects.filter(author=user).first()
+        if recipe is None:
+            raise CommandError(
+                'Нет рецептов для проверки, используйте --recipes'
+            )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        pattern = SEQUENTIAL_SCANS[connection.vendor]
+        scans = 0
+        for name, queryset in get_queries(user, recipe).items():
+            plan = explain(queryset)
+            derived = set(DERIVED_TABLES.findall(plan))
+            tables = [
+                table for table in pattern.findall(plan)
+                if table not in derived
+            ]
+            scans += len(tables)
+            if tables:
+                self.stdout.write(self.style.WARNING(
+                    f'{name}: последовательное сканирование '
+                    f'{", ".join(tables)}'
+                ))
+            else:
+                self.stdout.write(f'{name}: ok')
+            self.stdout.write(plan, self.style.SQL_FIELD)
+        return scans
+
+    @staticmethod
+    def generate(count):
+        users = create_ids(User, (
+            User(
+                email=f'explain{number}@example.com',
+                username=f'explain{number}',
+                first_name='explain',
+                last_name='explain',
+            )
+            for number in range(max(count // USERS_PER_RECIPES, 2))
+        ))
+        ingredients = create_ids(Ingredient, (
+            Ingredient(name=f'explain {number}', measurement_unit='г')
+            for number in range(max(count // 10, INGREDIENTS_PER_RECIPE))
+        ))
+        recipes = create_ids(Recipe, (
+            Recipe(
+                author_id=users[number % len(users)],
+                name=f'explain {number}',
+                text=f'explain {number}',
+                text_hash=get_text_hash(f'explain {number}'),
+                image=f'explain{number}.jpg',
+                cooking_time=number % 120 + 1,
+            )
+            for number in range(count)
+        ))
+        IngredientQuantity.objects.bulk_create(
+            IngredientQuantity(
+                recipe_id=recipe,
+                ingredient_id=ingredients[
+                    (number + offset) % len(ingredients)
+                ],
+                amount=offset + 1,
+            )
+            for number, recipe in enumerate(recipes)
+            for offset in range(INGREDIENTS_PER_RECIPE)
+        )
+        for model in (Favorite, Cart):
+            model.objects.bulk_create(
+                model(user_id=users[number % len(users)], recipe_id=recipe)
+                for number, recipe in enumerate(recipes[::7])
+            )
+        Follow.objects.bulk_create(
+            Follow(follower_id=follower, author_id=author)
+            for follower, author in zip(users, users[1:])
+        )
+        refresh_shopping_lists()
+        fill_timelines(Follow.objects.all())
+        update_similarity_index()
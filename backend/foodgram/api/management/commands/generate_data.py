@@ -0,0 +1,274 @@
+import random
+import time
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from ...cache import (INGREDIENTS_VERSION_KEY, RECIPES_VERSION_KEY,
+                      TAGS_VERSION_KEY, bump_versions_on_commit)
+from ...counters import COUNTERS, recount
+from ...feed import fill_timelines
+from ...models import (Cart, Favorite, Follow, Ingredient, IngredientQuantity,
+                       Recipe, Tag, User, get_text_hash)
+from ...search import update_recipe_search
+from ...shopping import refresh_shopping_lists
+from ...similarity import update_similarity_index
+
+PASSWORD = 'foodgram-benchmark'
+WORDS = (
+    'курица', 'говядина', 'свинина', 'рыба', 'рис', 'гречка', 'картофель',
+    'морковь', 'лук', 'чеснок', 'томаты', 'сыр', 'грибы', 'тыква', 'яблоки',
+    'творог', 'суп', 'салат', 'запеканка', 'пирог', 'рагу', 'котлеты',
+    'каша', 'блины', 'соус', 'жаркое', 'паста', 'плов',
+)
+FIRST_NAMES = ('Анна', 'Иван', 'Мария', 'Пётр', 'Ольга', 'Сергей')
+LAST_NAMES = ('Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Соколов')
+UNITS = ('г', 'кг', 'мл', 'л', 'шт.', 'ст. л.', 'ч. л.', 'по вкусу')
+TEXT_WORDS = 40
+MAX_TAGS_PER_RECIPE = 3
+MIN_INGREDIENTS_PER_RECIPE = 2
+MAX_AMOUNT = 500
+MAX_COOKING_TIME = 180
+
+
+class PowerLaw:
+
+    def __init__(self, items, alpha, rng):
+        self.items = list(items)
+        rng.shuffle(self.items)
+        self.cum_weights = list(accumulate(
+            1 / rank ** alpha for rank in range(1, len(self.items) + 1)
+        ))
+        self.rng = rng
+
+    def sample(self, count):
+        return self.rng.choices(
+            self.items, cum_weights=self.cum_weights, k=count
+        )
+
+    def distinct(self, count):
+        return set(self.sample(min(count, len(self.items))))
+
+
+def next_number(model):
+    return (model.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+
+
+def create_ids(model, objects, batch_size=None):
+    first = next_number(model)
+    created = model.objects.bulk_create(objects, batch_size=batch_size)
+    if all(instance.pk is not None for instance in created):
+        return [instance.pk for instance in created]
+    return list(model.objects.filter(pk__gte=first).order_by(
+        'pk'
+    ).values_list('pk', flat=True))
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует пользователей, рецепты, избранное, корзины и подписки '
+        'со степенным распределением популярности'
+    )
+
+    def add_arguments(self, parser):
+        for name, default, help in (
+            ('users', 1000, 'Количество пользователей'),
+            ('recipes', 10000, 'Количество рецептов'),
+            ('tags', 10, 'Минимальное количество тегов в базе'),
+            ('ingredients', 500, 'Минимальное количество ингредиентов'),
+            ('ingredients-per-recipe', 10, 'Максимум ингредиентов в рецепте'),
+            ('favorites', 20, 'Среднее число избранных на пользователя'),
+            ('carts', 5, 'Среднее число рецептов в корзине'),
+            ('follows', 10, 'Среднее число подписок на пользователя'),
+            ('batch-size', 5000, 'Размер пачки для bulk_create'),
+            ('seed', 0, 'Зерно генератора случайных чисел'),
+        ):
+            parser.add_argument(f'--{name}', type=int, default=default,
+                                help=help)
+        parser.add_argument(
+            '--alpha',
+            type=float,
+            default=1.1,
+            help='Показатель степенного распределения популярности',
+        )
+        parser.add_argument(
+            '--prefix',
+            default='gen',
+            help='Префикс имён и почты создаваемых пользователей',
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь')
+        self.rng = random.Random(options['seed'])
+        self.alpha = options['alpha']
+        self.batch_size = options['batch_size']
+        start = time.perf_counter()
+        with transaction.atomic():
+            tags = self.create_tags(options['tags'], options['prefix'])
+            ingredients = self.create_ingredients(options['ingredients'])
+            users = self.create_users(options['users'], options['prefix'])
+            recipes = self.create_recipes(
+                options['recipes'], users, options['prefix']
+            )
+            self.link_tags(recipes, tags)
+            self.link_ingredients(
+                recipes, ingredients, options['ingredients_per_recipe']
+            )
+            for model, user_field, items, item_field, per_user in (
+                (Favorite, 'user', recipes, 'recipe', options['favorites']),
+                (Cart, 'user', recipes, 'recipe', options['carts']),
+                (Follow, 'follower', users, 'author', options['follows']),
+            ):
+                self.create_pairs(
+                    model, user_field, users, item_field, items, per_user
+                )
+            for counter in COUNTERS:
+                recount(*counter)
+            fill_timelines(Follow.objects.all(), batch_size=self.batch_size)
+            update_recipe_search(recipes)
+            update_similarity_index(recipes, batch_size=self.batch_size)
+            refresh_shopping_lists(batch_size=self.batch_size)
+            bump_versions_on_commit(
+                INGREDIENTS_VERSION_KEY, RECIPES_VERSION_KEY, TAGS_VERSION_KEY
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - start:.1f} с'
+        ))
+
+    def report(self, model, count):
+        self.stdout.write(f'{model._meta.verbose_name_plural}: {count}')
+
+    def create_tags(self, count, prefix):
+        Tag.objects.bulk_create(
+            (
+                Tag(
+                    slug=f'{prefix}-{number}',
+                    name=f'{prefix} {number}',
+                    color=f'#{self.rng.randrange(1 << 24):06x}',
+                )
+                for number in range(Tag.objects.count(), count)
+            ),
+            ignore_conflicts=True,
+        )
+        tags = list(Tag.objects.values_list('id', flat=True))
+        self.report(Tag, len(tags))
+        return tags
+
+    def create_ingredients(self, count):
+        first = next_number(Ingredient)
+        Ingredient.objects.bulk_create(
+            (
+                Ingredient(
+                    name=f'{self.rng.choice(WORDS)} {number}',
+                    measurement_unit=self.rng.choice(UNITS),
+                )
+                for number in range(
+                    first, first + count - Ingredient.objects.count()
+                )
+            ),
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+        ingredients = list(Ingredient.objects.values_list('id', flat=True))
+        self.report(Ingredient, len(ingredients))
+        return ingredients
+
+    def create_users(self, count, prefix):
+        first = next_number(User)
+        password = make_password(PASSWORD)
+        users = create_ids(
+            User,
+            (
+                User(
+                    email=f'{prefix}{number}@example.com',
+                    username=f'{prefix}{number}',
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES),
+                    password=password,
+                )
+                for number in range(first, first + count)
+            ),
+            self.batch_size,
+        )
+        self.report(User, len(users))
+        return users
+
+    def create_recipes(self, count, users, prefix):
+        first = next_number(Recipe)
+        authors = PowerLaw(users, self.alpha, self.rng).sample(count)
+        recipes = []
+        for number, author in enumerate(authors, first):
+            text = ' '.join(self.rng.choices(WORDS, k=TEXT_WORDS))
+            recipes.append(Recipe(
+                author_id=author,
+                name=f'{" ".join(self.rng.sample(WORDS, 2))} {number}',
+                text=text,
+                text_hash=get_text_hash(text),
+                image=f'recipes/{prefix}{number}.jpg',
+                cooking_time=self.rng.randint(1, MAX_COOKING_TIME),
+            ))
+        recipes = create_ids(Recipe, recipes, self.batch_size)
+        self.report(Recipe, len(recipes))
+        return recipes
+
+    def link_tags(self, recipes, tags):
+        if not tags:
+            return
+        popular = PowerLaw(tags, self.alpha, self.rng)
+        links = Recipe.tags.through.objects.bulk_create(
+            (
+                Recipe.tags.through(recipe_id=recipe, tag_id=tag)
+                for recipe in recipes
+                for tag in popular.distinct(
+                    self.rng.randint(1, MAX_TAGS_PER_RECIPE)
+                )
+            ),
+            batch_size=self.batch_size,
+        )
+        self.stdout.write(f'тэги рецептов: {len(links)}')
+
+    def link_ingredients(self, recipes, ingredients, per_recipe):
+        if not ingredients:
+            return
+        popular = PowerLaw(ingredients, self.alpha, self.rng)
+        quantities = IngredientQuantity.objects.bulk_create(
+            (
+                IngredientQuantity(
+                    recipe_id=recipe,
+                    ingredient_id=ingredient,
+                    amount=self.rng.randint(1, MAX_AMOUNT),
+                )
+                for recipe in recipes
+                for ingredient in popular.distinct(self.rng.randint(
+                    MIN_INGREDIENTS_PER_RECIPE,
+                    max(per_recipe, MIN_INGREDIENTS_PER_RECIPE),
+                ))
+            ),
+            batch_size=self.batch_size,
+        )
+        self.report(IngredientQuantity, len(quantities))
+
+    def create_pairs(self, model, user_field, users, item_field, items,
+                     per_user):
+        if not items:
+            return
+        total = len(users) * per_user
+        pairs = set(zip(
+            PowerLaw(users, self.alpha, self.rng).sample(total),
+            PowerLaw(items, self.alpha, self.rng).sample(total),
+        ))
+        if model is Follow:
+            pairs = {(user, item) for user, item in pairs if user != item}
+        model.objects.bulk_create(
+            (
+                model(**{f'{user_field}_id': user, f'{item_field}_id': item})
+                for user, item in pairs
+            ),
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+        self.report(model, len(pairs))
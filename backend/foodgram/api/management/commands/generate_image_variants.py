@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from ...images import generate_image_variants
+from ...models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные копии фото рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать копии и для рецептов, где они уже есть',
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.filter(image_variants={})
+        done = failed = 0
+        for recipe_id, image_name in recipes.values_list('id', 'image'):
+            try:
+                generate_image_variants(recipe_id, image_name)
+            except (OSError, ValueError) as error:
+                failed += 1
+                self.stderr.write(f'{recipe_id}: {error}')
+                continue
+            done += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано рецептов: {done}, с ошибками: {failed}'
+        ))
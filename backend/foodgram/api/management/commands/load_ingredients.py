@@ -0,0 +1,161 @@
+import csv
+import io
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from ...bulk import bulk_upsert
+from ...cache import INGREDIENTS_VERSION_KEY, RECIPES_VERSION_KEY, bump_version
+from ...models import Ingredient
+
+FORMATS = ('csv', 'json', 'jsonl')
+CSV_HEADER = ['name', 'measurement_unit']
+READ_SIZE = 1 << 16
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if not row or row == CSV_HEADER:
+            continue
+        yield row[0], row[1]
+
+
+def read_jsonl(file):
+    for line in file:
+        if line.strip():
+            item = json.loads(line)
+            yield item['name'], item['measurement_unit']
+
+
+def read_json(file):
+    decoder = json.JSONDecoder()
+    buffer = file.read(READ_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('JSON-файл должен содержать массив')
+    buffer = buffer[1:]
+    while True:
+        buffer = buffer.lstrip().lstrip(',').lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            chunk = file.read(READ_SIZE)
+            if not chunk:
+                raise CommandError('JSON-файл обрывается на середине')
+            buffer += chunk
+            continue
+        yield item['name'], item['measurement_unit']
+        buffer = buffer[end:]
+
+
+READERS = {'csv': read_csv, 'json': read_json, 'jsonl': read_jsonl}
+
+
+class Command(BaseCommand):
+    help = 'Загружает ингредиенты из CSV, JSON или JSONL пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу с ингредиентами')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Формат файла, по умолчанию определяется по расширению',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Сколько строк записывать за один запрос',
+        )
+        parser.add_argument(
+            '--update',
+            action='store_true',
+            help='Обновлять ед. измерения у уже существующих ингредиентов',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(
+            path
+        )[1].lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(f'Неизвестный формат файла: {file_format}')
+        write = (
+            self.copy_batch if connection.vendor == 'postgresql'
+            else self.insert_batch
+        )
+        started = time.perf_counter()
+        total = 0
+        with open(path, encoding='utf-8', newline='') as file:
+            rows = READERS[file_format](file)
+            while True:
+                batch = dict(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                with transaction.atomic():
+                    write(batch, options['update'])
+                total += len(batch)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{total} строк, {total / elapsed:.0f} строк/с'
+                )
+        bump_version(INGREDIENTS_VERSION_KEY)
+        if options['update']:
+            bump_version(RECIPES_VERSION_KEY)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено {total} строк за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} строк/с)'
+        ))
+
+    @staticmethod
+    def insert_batch(batch, update):
+        if update:
+            bulk_upsert(
+                Ingredient,
+                ('name', 'measurement_unit'),
+                batch.items(),
+                unique_fields=('name',),
+                update_fields=('measurement_unit',),
+                batch_size=len(batch),
+            )
+            return
+        Ingredient.objects.bulk_create(
+            (
+                Ingredient(name=name, measurement_unit=measurement_unit)
+                for name, measurement_unit in batch.items()
+            ),
+            ignore_conflicts=True,
+        )
+
+    @staticmethod
+    def copy_batch(batch, update):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch.items())
+        buffer.seek(0)
+        table = connection.ops.quote_name(Ingredient._meta.db_table)
+        conflict = (
+            'ON CONFLICT (name) DO UPDATE '
+            'SET measurement_unit = EXCLUDED.measurement_unit'
+            if update else 'ON CONFLICT DO NOTHING'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMP TABLE ingredient_import '
+                '(name varchar(200), measurement_unit varchar(200)) '
+                'ON COMMIT DROP'
+            )
+            cursor.copy_expert(
+                'COPY ingredient_import FROM STDIN WITH (FORMAT csv)', buffer
+            )
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                f'SELECT name, measurement_unit FROM ingredient_import '
+                f'{conflict}'
+            )
+            cursor.execute('DROP TABLE ingredient_import')
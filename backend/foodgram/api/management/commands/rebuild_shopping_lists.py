@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...shopping import BATCH_SIZE, refresh_shopping_lists
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает списки покупок пользователей по их корзинам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            nargs='+',
+            help='Пересобрать списки только этих пользователей',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Размер пачки для записи позиций',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            refreshed, removed = refresh_shopping_lists(
+                options['users'], batch_size=options['batch_size']
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено позиций: {refreshed}, удалено: {removed}'
+        ))
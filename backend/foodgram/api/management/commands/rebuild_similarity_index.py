@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...similarity import BATCH_SIZE, update_similarity_index
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает индекс похожих рецептов по ингредиентам и тэгам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipes',
+            type=int,
+            nargs='+',
+            help='Пересобрать индекс только для этих рецептов',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Размер пачки для записи полос сигнатур',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            written = update_similarity_index(
+                options['recipes'], batch_size=options['batch_size']
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Записано полос сигнатур: {written}'
+        ))
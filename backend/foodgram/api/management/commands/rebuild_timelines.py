@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...feed import BATCH_SIZE, rebuild_timelines
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет ленты подписок с подписками: дописывает пропущенные '
+        'записи и удаляет записи отменённых подписок'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            nargs='+',
+            help='Сверить ленты только этих пользователей',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Размер пачки для записи лент',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            filled, removed = rebuild_timelines(
+                options['users'], batch_size=options['batch_size']
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено записей: {filled}, удалено: {removed}'
+        ))
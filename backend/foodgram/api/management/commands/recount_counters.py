@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from ...counters import COUNTERS, find_drift, recount
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики рецептов и пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать расхождения, ничего не исправлять',
+        )
+
+    def handle(self, *args, **options):
+        total_drift = 0
+        for model, counter, related, field in COUNTERS:
+            drift = list(find_drift(model, counter, related, field))
+            total_drift += len(drift)
+            label = f'{model.__name__}.{counter}'
+            for pk, stored, actual in drift[:10]:
+                self.stdout.write(f'{label} #{pk}: {stored} -> {actual}')
+            if drift and not options['dry_run']:
+                recount(
+                    model, counter, related, field, [pk for pk, *_ in drift]
+                )
+            self.stdout.write(f'{label}: расхождений {len(drift)}')
+        style = self.style.WARNING if total_drift else self.style.SUCCESS
+        self.stdout.write(style(f'Всего расхождений: {total_drift}'))
@@ -0,0 +1,266 @@
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+FLUSH_INTERVAL = 5
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+UNRESOLVED_VIEW = 'unresolved'
+COUNT, LATENCY, QUERIES, SQL_TIME, SERIALIZER_TIME, RESPONSE_SIZE = range(6)
+BUCKETS_OFFSET = 6
+COUNTERS = (
+    (
+        QUERIES, 'foodgram_sql_queries_total',
+        'Количество SQL-запросов',
+    ),
+    (
+        SQL_TIME, 'foodgram_sql_duration_seconds_total',
+        'Суммарное время SQL-запросов',
+    ),
+    (
+        SERIALIZER_TIME, 'foodgram_serializer_duration_seconds_total',
+        'Суммарное время сериализации',
+    ),
+    (
+        RESPONSE_SIZE, 'foodgram_response_size_bytes_total',
+        'Суммарный размер ответов',
+    ),
+)
+
+current_request = ContextVar('current_request', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'sql_time', 'serializer_time', 'serializing')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - start
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_request.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class MetricsStore:
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.views = {}
+        self.counters = {}
+        self.flushed_at = time.monotonic()
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, f'{os.getpid()}.json')
+
+    def observe(self, view, latency, metrics, size):
+        with self.lock:
+            values = self.views.get(view)
+            if values is None:
+                values = self.views[view] = [0] * (
+                    BUCKETS_OFFSET + len(LATENCY_BUCKETS)
+                )
+            values[COUNT] += 1
+            values[LATENCY] += latency
+            values[QUERIES] += metrics.queries
+            values[SQL_TIME] += metrics.sql_time
+            values[SERIALIZER_TIME] += metrics.serializer_time
+            values[RESPONSE_SIZE] += size
+            for index, bucket in enumerate(LATENCY_BUCKETS, BUCKETS_OFFSET):
+                if latency <= bucket:
+                    values[index] += 1
+            self.flush_if_due()
+
+    def increment(self, counter, label):
+        with self.lock:
+            labels = self.counters.setdefault(counter, {})
+            labels[label] = labels.get(label, 0) + 1
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        if time.monotonic() - self.flushed_at >= FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        self.flushed_at = time.monotonic()
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump({'views': self.views, 'counters': self.counters}, file)
+        os.replace(temporary, self.path)
+
+    def collect(self):
+        with self.lock:
+            self.flush()
+        views, counters = {}, {}
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as file:
+                    worker = json.load(file)
+            except (OSError, ValueError):
+                continue
+            for view, values in worker.get('views', {}).items():
+                total = views.setdefault(view, [0] * len(values))
+                for index, value in enumerate(values):
+                    total[index] += value
+            for counter, labels in worker.get('counters', {}).items():
+                total = counters.setdefault(counter, {})
+                for label, value in labels.items():
+                    total[label] = total.get(label, 0) + value
+        return views, counters
+
+
+metrics_store = MetricsStore(getattr(
+    settings, 'METRICS_DIR', os.path.join(settings.BASE_DIR, 'metrics')
+))
+
+
+def get_view_name(request):
+    match = request.resolver_match
+    if match is None:
+        return UNRESOLVED_VIEW
+    view = match.func
+    cls = getattr(view, 'cls', None)
+    if cls is None:
+        return f'{view.__module__}.{view.__name__}'
+    method = request.method.lower()
+    actions = getattr(view, 'actions', None) or {}
+    return f'{cls.__name__}.{actions.get(method, method)}'
+
+
+def format_labels(view, **labels):
+    labels = {'view': view, **labels}
+    return ','.join(
+        f'{name}="{json.dumps(value, ensure_ascii=False)[1:-1]}"'
+        for name, value in labels.items()
+    )
+
+
+def render_metrics(views, counters):
+    lines = [
+        '# HELP foodgram_request_duration_seconds Время обработки запроса',
+        '# TYPE foodgram_request_duration_seconds histogram',
+    ]
+    for view, values in sorted(views.items()):
+        for index, bucket in enumerate(LATENCY_BUCKETS, BUCKETS_OFFSET):
+            lines.append(
+                'foodgram_request_duration_seconds_bucket'
+                f'{{{format_labels(view, le=str(bucket))}}} {values[index]}'
+            )
+        lines.append(
+            'foodgram_request_duration_seconds_bucket'
+            f'{{{format_labels(view, le="+Inf")}}} {values[COUNT]}'
+        )
+        lines.append(
+            'foodgram_request_duration_seconds_sum'
+            f'{{{format_labels(view)}}} {values[LATENCY]}'
+        )
+        lines.append(
+            'foodgram_request_duration_seconds_count'
+            f'{{{format_labels(view)}}} {values[COUNT]}'
+        )
+    for index, name, description in COUNTERS:
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} counter')
+        for view, values in sorted(views.items()):
+            lines.append(f'{name}{{{format_labels(view)}}} {values[index]}')
+    for name, labels in sorted(counters.items()):
+        lines.append(f'# TYPE {name} counter')
+        for label, value in sorted(labels.items()):
+            lines.append(f'{name}{{result="{label}"}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    return HttpResponse(
+        render_metrics(*metrics_store.collect()), content_type=CONTENT_TYPE
+    )
+
+
+class SerializerMetricsMixin:
+
+    def to_representation(self, instance):
+        metrics = current_request.get()
+        if metrics is None or metrics.serializing:
+            return super().to_representation(instance)
+        metrics.serializing = True
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializing = False
+            metrics.serializer_time += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_request.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self.observe(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_request.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self.observe(request, response, metrics, start)
+
+    @staticmethod
+    def observe(request, response, metrics, start):
+        size = 0 if response.streaming else len(response.content)
+        metrics_store.observe(
+            get_view_name(request),
+            time.perf_counter() - start,
+            metrics,
+            size,
+        )
+        return response
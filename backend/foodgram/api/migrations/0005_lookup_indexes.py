@@ -0,0 +1,64 @@
+# Generated by Django 4.1.7 on 2026-10-17 07:20
+
+from hashlib import sha256
+
+from django.db import migrations, models
+
+
+def fill_text_hash(apps, schema_editor):
+    Recipe = apps.get_model('api', 'Recipe')
+    recipes = list(Recipe.objects.only('id', 'text'))
+    for recipe in recipes:
+        recipe.text_hash = sha256(recipe.text.encode()).hexdigest()
+    Recipe.objects.bulk_update(recipes, ['text_hash'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='text_hash',
+            field=models.CharField(
+                default='',
+                editable=False,
+                max_length=64,
+                verbose_name='хэш рецепта',
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_text_hash, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='recipe',
+            name='name_text_constraint',
+        ),
+        migrations.AddConstraint(
+            model_name='recipe',
+            constraint=models.UniqueConstraint(
+                fields=('name', 'text_hash'),
+                name='name_text_hash_constraint',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(
+                fields=['author', '-id'],
+                name='recipe_author_id_idx',
+            ),
+        ),
+        migrations.RemoveConstraint(
+            model_name='favorite',
+            name='recipe_user_constraint',
+        ),
+        migrations.AddConstraint(
+            model_name='favorite',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='recipe_user_constraint',
+            ),
+        ),
+    ]
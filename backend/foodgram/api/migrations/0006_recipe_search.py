@@ -0,0 +1,69 @@
+# Generated by Django 4.1.7 on 2026-10-17 07:13
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+RECIPE_INGREDIENT_NAMES = (
+    'SELECT {aggregate} FROM api_ingredientquantity '
+    'JOIN api_ingredient '
+    'ON api_ingredient.id = api_ingredientquantity.ingredient_id '
+    'WHERE api_ingredientquantity.recipe_id = api_recipe.id'
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX recipe_search_vector_idx '
+            'ON api_recipe USING gin (search_vector)'
+        )
+        schema_editor.execute(
+            "UPDATE api_recipe SET search_vector = "
+            "setweight(to_tsvector('russian', name), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(({names}), ''))"
+            ", 'B') || "
+            "setweight(to_tsvector('russian', text), 'C')".format(
+                names=RECIPE_INGREDIENT_NAMES.format(
+                    aggregate="string_agg(api_ingredient.name, ' ')"
+                )
+            )
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE api_recipe_search '
+            'USING fts5(name, ingredients, text)'
+        )
+        schema_editor.execute(
+            'INSERT INTO api_recipe_search (rowid, name, ingredients, text) '
+            "SELECT id, name, coalesce(({names}), ''), text "
+            'FROM api_recipe'.format(
+                names=RECIPE_INGREDIENT_NAMES.format(
+                    aggregate="group_concat(api_ingredient.name, ' ')"
+                )
+            )
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX recipe_search_vector_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE api_recipe_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
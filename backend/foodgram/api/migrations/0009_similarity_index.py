@@ -0,0 +1,69 @@
+# Generated by Django 4.1.7 on 2026-10-17 08:06
+
+import heapq
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from api.similarity import BATCH_SIZE, signature_buckets
+
+
+def fill_signature_bands(apps, schema_editor):
+    IngredientQuantity = apps.get_model('api', 'IngredientQuantity')
+    Recipe = apps.get_model('api', 'Recipe')
+    RecipeSignatureBand = apps.get_model('api', 'RecipeSignatureBand')
+    ingredients = IngredientQuantity.objects.values_list(
+        'recipe', 'ingredient'
+    ).order_by('recipe_id')
+    tags = Recipe.tags.through.objects.values_list(
+        'recipe', 'tag'
+    ).order_by('recipe_id')
+    rows = heapq.merge(
+        ((recipe, ingredient * 2) for recipe, ingredient
+         in ingredients.iterator()),
+        ((recipe, tag * 2 + 1) for recipe, tag in tags.iterator()),
+    )
+    bands = (
+        RecipeSignatureBand(recipe_id=recipe, band=band, bucket=bucket)
+        for recipe, group in groupby(rows, itemgetter(0))
+        for band, bucket in enumerate(
+            signature_buckets({feature for _, feature in group})
+        )
+    )
+    for batch in iter(lambda: list(islice(bands, BATCH_SIZE)), []):
+        RecipeSignatureBand.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_timeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSignatureBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField(verbose_name='номер полосы')),
+                ('bucket', models.BigIntegerField(verbose_name='хэш полосы')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='signature_bands', to='api.recipe', verbose_name='рецепт')),
+            ],
+            options={
+                'verbose_name': 'полоса сигнатуры рецепта',
+                'verbose_name_plural': 'сигнатуры рецептов',
+                'ordering': ('recipe', 'band'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipesignatureband',
+            index=models.Index(fields=['band', 'bucket', 'recipe'], name='signature_bucket_recipe_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipesignatureband',
+            constraint=models.UniqueConstraint(fields=('recipe', 'band'), name='recipe_band_constraint'),
+        ),
+        migrations.RunPython(fill_signature_bands, migrations.RunPython.noop),
+    ]
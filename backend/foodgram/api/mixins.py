@@ -0,0 +1,175 @@
+import hashlib
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import classonlymethod
+from django.utils.http import http_date, quote_etag
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from .cache import (RESPONSE_CACHE_EVICTIONS, RESPONSE_CACHE_HITS,
+                    RESPONSE_CACHE_MISSES, RESPONSE_CACHE_TIMEOUT,
+                    count_response_cache, get_membership_versions,
+                    get_versions, normalized_query, response_cache_key)
+from .replicas import (NANOSECONDS, choose_replica, current_replica,
+                       fresh_reads, stick_to_primary)
+from .utils import check_user_and_request
+
+
+class ConditionalGetMixin:
+    cache_versions = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_condition_versions(self, request, kwargs):
+        versions = get_versions(self.cache_versions)
+        check_result, user = check_user_and_request(request)
+        if check_result:
+            versions += get_membership_versions(user.id)
+        return versions
+
+    def get_condition(self, request, kwargs):
+        versions = self.get_condition_versions(request, kwargs)
+        if not versions:
+            return None
+        raw_etag = (
+            f'{self.basename}:{self.action}:{kwargs}:'
+            f'{request.accepted_renderer.format}:'
+            f'{normalized_query(request)}:{versions}'
+        )
+        etag = quote_etag(hashlib.md5(raw_etag.encode()).hexdigest())
+        return etag, max(versions)
+
+    @staticmethod
+    def set_condition_headers(response, etag, version):
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(version // NANOSECONDS)
+        return response
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        condition = self.get_condition(request, kwargs)
+        if condition is None:
+            return handler(request, *args, **kwargs)
+        etag, version = condition
+        response = get_conditional_response(
+            request, etag=etag, last_modified=version // NANOSECONDS
+        )
+        if response is None:
+            with fresh_reads((version,)):
+                response = handler(request, *args, **kwargs)
+        return self.set_condition_headers(response, etag, version)
+
+
+class AnonymousResponseCacheMixin:
+    cache_versions = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cached_response(self, request, kwargs):
+        key = response_cache_key(request, self.basename, self.action, kwargs)
+        versions = get_versions(self.cache_versions)
+        entry = cache.get(key)
+        if entry is not None:
+            entry_versions, data = entry
+            if entry_versions == versions:
+                count_response_cache(RESPONSE_CACHE_HITS)
+                return key, versions, Response(
+                    data, headers={'X-Cache': 'HIT'}
+                )
+            count_response_cache(RESPONSE_CACHE_EVICTIONS)
+        count_response_cache(RESPONSE_CACHE_MISSES)
+        return key, versions, None
+
+    @staticmethod
+    def store_response(key, versions, response):
+        if response.status_code == 200:
+            cache.set(key, (versions, response.data), RESPONSE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not request.user.is_anonymous:
+            return handler(request, *args, **kwargs)
+        key, versions, response = self.get_cached_response(request, kwargs)
+        if response is not None:
+            return response
+        with fresh_reads(versions):
+            response = handler(request, *args, **kwargs)
+        return self.store_response(key, versions, response)
+
+
+def read_in_worker_thread(view, request, *args, **kwargs):
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+class AsyncReadMixin:
+    async_actions = ('list', 'retrieve')
+
+    @classonlymethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not getattr(settings, 'ASYNC_READ_VIEWS', False):
+            return view
+        read_view = sync_to_async(
+            partial(read_in_worker_thread, view), thread_sensitive=False
+        )
+        write_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            if actions.get(request.method.lower()) in cls.async_actions:
+                return await read_view(request, *args, **kwargs)
+            return await write_view(request, *args, **kwargs)
+
+        async_view.cls = cls
+        async_view.initkwargs = initkwargs
+        async_view.actions = actions
+        async_view.csrf_exempt = True
+        return async_view
+
+
+class ReplicaReadMixin:
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            current_replica.set(None)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        current_replica.set(choose_replica(request))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            stick_to_primary(request.user.id)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -1,6 +1,11 @@
+from hashlib import sha256
+
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, RegexValidator
 from django.db import models
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
 
 MAX_LENGTH_150 = 150
 MAX_LENGTH_200 = 200
@@ -15,6 +20,10 @@ class User(AbstractUser):
         unique=True)
     first_name = models.CharField('Имя', max_length=MAX_LENGTH_150)
     last_name = models.CharField('Фамилия', max_length=MAX_LENGTH_150)
+    recipes_count = models.PositiveIntegerField('кол-во рецептов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'кол-во подписчиков', default=0
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('username', 'first_name', 'last_name',)
@@ -70,6 +79,42 @@ class Ingredient(models.Model):
         return f'{self.name} ({self.measurement_unit})'
 
 
+def get_text_hash(text):
+    return sha256(text.encode()).hexdigest()
+
+
+class RecipeQuerySet(models.QuerySet):
+
+    def with_related(self):
+        return self.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'recipes',
+                queryset=IngredientQuantity.objects.select_related(
+                    'ingredient'
+                )
+            ),
+        )
+
+    def first_per_author(self, authors, limit=None):
+        queryset = self.filter(author__in=authors)
+        if limit is None:
+            return queryset.order_by('name', 'id')
+        queryset = queryset.annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=F('author'),
+                order_by=(F('name').asc(), F('id').asc()),
+            )
+        ).order_by()
+        sql, params = queryset.query.sql_with_params()
+        return self.raw(
+            f'SELECT * FROM ({sql}) AS recipes WHERE row_number <= %s '
+            'ORDER BY name, id',
+            (*params, limit)
+        )
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User,
@@ -79,7 +124,13 @@ class Recipe(models.Model):
     )
     name = models.CharField('название', max_length=50)
     image = models.ImageField('фото')
+    image_variants = models.JSONField(
+        'уменьшенные копии фото', default=dict, blank=True
+    )
     text = models.TextField('сам рецепт')
+    text_hash = models.CharField(
+        'хэш рецепта', max_length=64, editable=False
+    )
     cooking_time = models.PositiveSmallIntegerField(
         'время приготовления',
         validators=(
@@ -96,6 +147,16 @@ class Recipe(models.Model):
         through='IngredientQuantity',
         through_fields=('recipe', 'ingredient'),
     )
+    updated_at = models.DateTimeField('дата изменения', auto_now=True)
+    favorites_count = models.PositiveIntegerField(
+        'в избранном', default=0
+    )
+    in_cart_count = models.PositiveIntegerField('в корзинах', default=0)
+    search_vector = SearchVectorField(
+        'поисковый вектор', null=True, editable=False
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'рецепт'
@@ -111,14 +172,31 @@ class Recipe(models.Model):
                 name='name_image_constraint'
             ),
             models.UniqueConstraint(
-                fields=['name', 'text'],
-                name='name_text_constraint'
+                fields=['name', 'text_hash'],
+                name='name_text_hash_constraint'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['author', '-id'],
+                name='recipe_author_id_idx'
+            ),
+            models.Index(
+                fields=['updated_at'],
+                name='recipe_updated_at_idx'
             ),
         ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.text_hash = get_text_hash(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'text_hash'}
+        super().save(*args, **kwargs)
+
 
 class IngredientQuantity(models.Model):
     amount = models.PositiveSmallIntegerField(
@@ -205,7 +283,7 @@ class Favorite(models.Model):
         ordering = ('user',)
         constraints = [
             models.UniqueConstraint(
-                fields=['recipe', 'user'],
+                fields=['user', 'recipe'],
                 name='recipe_user_constraint'
             )
         ]
@@ -240,3 +318,99 @@ class Cart(models.Model):
 
     def __str__(self):
         return f'Рецепт {self.recipe} в корзине {self.user}'
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        verbose_name='пользователь',
+        on_delete=models.CASCADE,
+        related_name='shopping_list'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        verbose_name='ингредиент',
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items'
+    )
+    amount = models.PositiveIntegerField('общее кол-во')
+
+    class Meta:
+        verbose_name = 'позиция списка покупок'
+        verbose_name_plural = 'списки покупок'
+        ordering = ('user',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='user_ingredient_constraint'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user}: {self.ingredient} - {self.amount}'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        verbose_name='пользователь',
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='автор',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='рецепт',
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'ленты подписок'
+        ordering = ('user', '-recipe_id')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='user_recipe_timeline_constraint'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} в ленте {self.user}'
+
+
+class RecipeSignatureBand(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='рецепт',
+        on_delete=models.CASCADE,
+        related_name='signature_bands'
+    )
+    band = models.PositiveSmallIntegerField('номер полосы')
+    bucket = models.BigIntegerField('хэш полосы')
+
+    class Meta:
+        verbose_name = 'полоса сигнатуры рецепта'
+        verbose_name_plural = 'сигнатуры рецептов'
+        ordering = ('recipe', 'band')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'band'],
+                name='recipe_band_constraint'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['band', 'bucket', 'recipe'],
+                name='signature_bucket_recipe_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe}: полоса {self.band}'
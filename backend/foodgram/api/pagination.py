@@ -1,6 +1,153 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
+
+PAGE_SIZE = 10
+MAX_FEED_PAGE_SIZE = 100
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATE = 'estimate'
+COUNT_NONE = 'none'
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATE, COUNT_NONE)
+
+
+def estimate_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']['Plan Rows']
+
+
+class UncountedPaginator(Paginator):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count = 0
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            return super().validate_number(number)
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not object_list and number > 1:
+            raise EmptyPage('Страница не содержит результатов')
+        self.count = bottom + len(object_list)
+        return self._get_page(object_list[:self.per_page], number, self)
+
+
+class KeysetPagination(CursorPagination):
+    page_size = PAGE_SIZE
+    page_size_query_param = 'limit'
+    ordering = '-id'
+
+
+class FeedPagination(KeysetPagination):
+    max_page_size = MAX_FEED_PAGE_SIZE
+
+    def paginate_feed(self, fetch, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        try:
+            before = None if cursor is None else int(cursor.position)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        ids = fetch(before, self.page_size + 1)
+        self.next_position = (
+            ids[self.page_size - 1] if len(ids) > self.page_size else None
+        )
+        return ids[:self.page_size]
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self.next_position)
+        )
+
+    def get_previous_link(self):
+        return None
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': None,
+            'results': data,
+        })
 
 
 class LimitPageNumberPagination(PageNumberPagination):
-    page_size = 10
+    page_size = PAGE_SIZE
     page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+
+    def get_count_mode(self, request, default):
+        count_mode = request.query_params.get(self.count_query_param)
+        return count_mode if count_mode in COUNT_MODES else default
+
+    def get_count(self, queryset, count_mode):
+        if count_mode == COUNT_ESTIMATE:
+            return estimate_count(queryset)
+        if count_mode == COUNT_EXACT:
+            return queryset.count()
+        return None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.cursor_query_param in request.query_params:
+            self.request = request
+            self.count = self.get_count(
+                queryset, self.get_count_mode(request, COUNT_NONE)
+            )
+            self.cursor_paginator = KeysetPagination()
+            page = self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+            self.display_page_controls = (
+                self.cursor_paginator.display_page_controls
+            )
+            return page
+        count_mode = self.get_count_mode(request, COUNT_EXACT)
+        if count_mode == COUNT_EXACT:
+            self.django_paginator_class = Paginator
+            page = super().paginate_queryset(queryset, request, view)
+            self.count = self.page.paginator.count
+            return page
+        self.django_paginator_class = UncountedPaginator
+        page = super().paginate_queryset(queryset, request, view)
+        self.count = self.get_count(queryset, count_mode)
+        return page
+
+    def get_paginated_response(self, data):
+        paginator = self.cursor_paginator or self
+        return Response({
+            'count': self.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'results': data,
+        })
+
+    def to_html(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
@@ -0,0 +1,50 @@
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+SHOPPING_LIST_FIELDS = ('name', 'measurement_unit', 'amount')
+
+
+class Echo:
+
+    def write(self, value):
+        return value
+
+
+class ShoppingListTextRenderer(BaseRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            return '\n'.join(f'{key}: {value}' for key, value in data.items())
+        return str(data)
+
+    def stream(self, rows):
+        for name, measurement_unit, amount in rows:
+            yield f'{name}({measurement_unit})-{amount}\n'
+
+
+class ShoppingListCSVRenderer(ShoppingListTextRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(SHOPPING_LIST_FIELDS)
+        for row in rows:
+            yield writer.writerow(row)
+
+
+class ShoppingListJSONRenderer(JSONRenderer):
+
+    def stream(self, rows):
+        separator = '['
+        for row in rows:
+            yield separator + json.dumps(
+                dict(zip(SHOPPING_LIST_FIELDS, row)), ensure_ascii=False
+            )
+            separator = ','
+        yield '[]' if separator == '[' else ']'
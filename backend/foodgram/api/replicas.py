@@ -0,0 +1,70 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import cycle
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+DATABASE_REPLICAS = tuple(getattr(settings, 'DATABASE_REPLICAS', ()))
+REPLICA_STICKY_SECONDS = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+NANOSECONDS = 10 ** 9
+VERSIONS_CACHE = 'versions'
+
+current_replica = ContextVar('current_replica', default=None)
+replicas = cycle(DATABASE_REPLICAS)
+
+
+def sticky_key(user_id):
+    return f'primary:{user_id}'
+
+
+def stick_to_primary(user_id):
+    caches[VERSIONS_CACHE].set(
+        sticky_key(user_id), True, REPLICA_STICKY_SECONDS
+    )
+
+
+def choose_replica(request):
+    if not DATABASE_REPLICAS or request.method not in SAFE_METHODS:
+        return None
+    user = request.user
+    if user.is_authenticated and caches[VERSIONS_CACHE].get(
+        sticky_key(user.id)
+    ):
+        return None
+    return next(replicas)
+
+
+def replicas_may_lag(versions):
+    horizon = time.time_ns() - REPLICA_STICKY_SECONDS * NANOSECONDS
+    return any(version > horizon for version in versions)
+
+
+@contextmanager
+def fresh_reads(versions):
+    if current_replica.get() is None or not replicas_may_lag(versions):
+        yield
+        return
+    token = current_replica.set(None)
+    try:
+        yield
+    finally:
+        current_replica.reset(token)
+
+
+class ReplicaRouter:
+    databases = {DEFAULT_DB_ALIAS, *DATABASE_REPLICAS}
+
+    def db_for_read(self, model, **hints):
+        return current_replica.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if {obj1._state.db, obj2._state.db} <= self.databases:
+            return True
+        return None
@@ -0,0 +1,234 @@
+import bisect
+import json
+import re
+import threading
+from array import array
+from collections import Counter
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F
+
+from .batches import on_commit_batch
+from .cache import INGREDIENTS_VERSION_KEY, get_version
+from .models import Ingredient
+from .replicas import fresh_reads
+
+MIN_SUBSTRING_QUERY_LENGTH = 2
+MIN_FUZZY_QUERY_LENGTH = 4
+LONG_QUERY_LENGTH = 8
+SEARCH_CONFIG = 'russian'
+SEARCH_TABLE = 'api_recipe_search'
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0)
+RECIPE_INGREDIENT_NAMES = (
+    'SELECT {aggregate} FROM api_ingredientquantity '
+    'JOIN api_ingredient '
+    'ON api_ingredient.id = api_ingredientquantity.ingredient_id '
+    'WHERE api_ingredientquantity.recipe_id = api_recipe.id'
+)
+UPDATE_SEARCH_VECTOR = (
+    "UPDATE api_recipe SET search_vector = "
+    "setweight(to_tsvector(%(config)s, name), 'A') || "
+    "setweight(to_tsvector(%(config)s, coalesce(({names}), ''))"
+    ", 'B') || "
+    "setweight(to_tsvector(%(config)s, text), 'C')"
+).format(names=RECIPE_INGREDIENT_NAMES.format(
+    aggregate="string_agg(api_ingredient.name, ' ')"
+))
+DELETE_SEARCH_ROWS = f'DELETE FROM {SEARCH_TABLE}'
+INSERT_SEARCH_ROWS = (
+    f'INSERT INTO {SEARCH_TABLE} (rowid, name, ingredients, text) '
+    "SELECT id, name, coalesce(({names}), ''), text FROM api_recipe"
+).format(names=RECIPE_INGREDIENT_NAMES.format(
+    aggregate="group_concat(api_ingredient.name, ' ')"
+))
+
+
+def normalize(value):
+    return value.casefold().replace('ё', 'е').replace('_', ' ')
+
+
+def bigrams(value):
+    return {value[i:i + 2] for i in range(len(value) - 1)}
+
+
+def prefix_distance(query, word, limit):
+    common = 0
+    for query_char, word_char in zip(query, word):
+        if query_char != word_char:
+            break
+        common += 1
+    if common == len(query):
+        return 0
+    if limit == 0:
+        return 1
+    query, word = query[common:], word[common:]
+    return 1 + min(
+        prefix_distance(query[1:], word[1:], limit - 1),
+        prefix_distance(query[1:], word, limit - 1),
+        prefix_distance(query, word[1:], limit - 1),
+    )
+
+
+class IngredientIndex:
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.version = None
+        self.lock = threading.Lock()
+        self.ids = array('q')
+        self.names = []
+        self.units = []
+        self.keys = []
+        self.text = ''
+        self.offsets = array('l')
+        self.words = []
+        self.word_entries = []
+        self.postings = {}
+
+    def build(self, rows):
+        rows = sorted(
+            (normalize(name), pk, name, unit) for pk, name, unit in rows
+        )
+        units = {}
+        self.ids = array('q', (row[1] for row in rows))
+        self.names = [row[2] for row in rows]
+        self.units = [units.setdefault(row[3], row[3]) for row in rows]
+        self.keys = [row[0] for row in rows]
+        self.text = '\n'.join(self.keys)
+        self.offsets = array('l')
+        position = 0
+        word_entries = {}
+        for index, key in enumerate(self.keys):
+            self.offsets.append(position)
+            position += len(key) + 1
+            for word in key.split():
+                word_entries.setdefault(word, array('l')).append(index)
+        self.words = list(word_entries)
+        self.word_entries = list(word_entries.values())
+        postings = {}
+        for word_index, word in enumerate(self.words):
+            for bigram in bigrams(word):
+                postings.setdefault(
+                    word[0] + bigram, array('l')
+                ).append(word_index)
+        self.postings = postings
+
+    def refresh(self):
+        version = get_version(INGREDIENTS_VERSION_KEY)
+        if version == self.version:
+            return
+        with self.lock:
+            if version != self.version:
+                with fresh_reads((version,)):
+                    self.build(self.loader())
+                self.version = version
+
+    def prefix_matches(self, query):
+        index = bisect.bisect_left(self.keys, query)
+        while index < len(self.keys) and self.keys[index].startswith(query):
+            yield index
+            index += 1
+
+    def substring_matches(self, query):
+        position = self.text.find(query)
+        while position != -1:
+            index = bisect.bisect_right(self.offsets, position) - 1
+            yield index
+            next_key = self.offsets[index] + len(self.keys[index]) + 1
+            position = self.text.find(query, max(position + 1, next_key))
+
+    def fuzzy_matches(self, query):
+        limit = 1 if len(query) < LONG_QUERY_LENGTH else 2
+        query_bigrams = bigrams(query)
+        threshold = max(len(query_bigrams) - 2 * limit, 1)
+        counter = Counter()
+        for bigram in query_bigrams:
+            counter.update(self.postings.get(query[0] + bigram, ()))
+        scored = []
+        for word_index, shared in counter.items():
+            if shared < threshold:
+                continue
+            word = self.words[word_index][:len(query) + limit]
+            distance = prefix_distance(query, word, limit)
+            if distance <= limit:
+                scored.extend(
+                    (distance, index)
+                    for index in self.word_entries[word_index]
+                )
+        return [index for _, index in sorted(scored)]
+
+    def search(self, query):
+        self.refresh()
+        query = normalize(query.strip())
+        if not query:
+            return list(range(len(self.keys)))
+        found = dict.fromkeys(self.prefix_matches(query))
+        if len(query) >= MIN_SUBSTRING_QUERY_LENGTH:
+            for index in self.substring_matches(query):
+                found.setdefault(index)
+        if len(query) >= MIN_FUZZY_QUERY_LENGTH:
+            for index in self.fuzzy_matches(query):
+                found.setdefault(index)
+        return list(found)
+
+    def rows(self, indexes):
+        return [
+            (self.ids[index], self.names[index], self.units[index])
+            for index in indexes
+        ]
+
+
+ingredient_index = IngredientIndex(
+    lambda: Ingredient.objects.values_list('id', 'name', 'measurement_unit')
+)
+
+
+def update_recipe_search(recipe_ids=None):
+    if connection.vendor == 'postgresql':
+        where, params = '', {'config': SEARCH_CONFIG}
+        if recipe_ids is not None:
+            where, params['ids'] = ' WHERE id = ANY(%(ids)s)', list(recipe_ids)
+        with connection.cursor() as cursor:
+            cursor.execute(UPDATE_SEARCH_VECTOR + where, params)
+    elif connection.vendor == 'sqlite':
+        where, params = '', ()
+        if recipe_ids is not None:
+            where, params = (
+                ' WHERE {} IN (SELECT value FROM json_each(%s))',
+                (json.dumps(list(recipe_ids)),),
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(DELETE_SEARCH_ROWS + where.format('rowid'), params)
+            cursor.execute(INSERT_SEARCH_ROWS + where.format('id'), params)
+
+
+def update_recipe_search_on_commit(recipe_ids):
+    on_commit_batch(update_recipe_search, recipe_ids)
+
+
+def search_recipes(queryset, value):
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-id')
+    if connection.vendor != 'sqlite':
+        return queryset.filter(name__icontains=value)
+    match = ' '.join(
+        f'"{word}"*' for word in re.findall(r'\w+', value)
+    )
+    if not match:
+        return queryset.none()
+    weights = ', '.join(map(str, SEARCH_WEIGHTS))
+    return queryset.extra(
+        select={'rank': f'bm25({SEARCH_TABLE}, {weights})'},
+        tables=(SEARCH_TABLE,),
+        where=(
+            f'{SEARCH_TABLE} MATCH %s',
+            f'{SEARCH_TABLE}.rowid = api_recipe.id',
+        ),
+        params=(match,),
+    ).order_by('rank', '-id')
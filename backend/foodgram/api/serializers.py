@@ -1,11 +1,15 @@
-from django.shortcuts import get_object_or_404
+from django.db import transaction
 from djoser.serializers import UserSerializer as DjoserSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers, status
 
-from .models import (Cart, Favorite, Follow, Ingredient, IngredientQuantity,
-                     Recipe, Tag, User)
-from .utils import check_user_and_request
+from .cache import FAVORITES, FOLLOWING, SHOPPING_CART
+from .images import (CARD, THUMBNAIL, delete_image_variants_on_commit,
+                     get_image_url, schedule_image_variants)
+from .metrics import SerializerMetricsMixin
+from .models import Follow, Ingredient, IngredientQuantity, Recipe, Tag, User
+from .signals import recipe_ingredients_changed
+from .utils import get_memberships, get_recipes_limit
 
 USER_SERIALIZER_FIELDS = (
     'id',
@@ -15,23 +19,27 @@ USER_SERIALIZER_FIELDS = (
     'last_name',
     'is_subscribed',
 )
+CARD_IMAGE_ACTIONS = ('list', 'feed')
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(
+    SerializerMetricsMixin,
+    serializers.ModelSerializer
+):
 
     class Meta:
         model = Ingredient
         fields = ('id', 'name', 'measurement_unit',)
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(SerializerMetricsMixin, serializers.ModelSerializer):
 
     class Meta:
         fields = '__all__'
         model = Tag
 
 
-class UserSerializer(DjoserSerializer):
+class UserSerializer(SerializerMetricsMixin, DjoserSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
@@ -40,23 +48,38 @@ class UserSerializer(DjoserSerializer):
         read_only_fields = ('is_subscribed',)
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if request is None:
-            return False
-        return Follow.objects.filter(
-            follower=request.user, author=obj
-        ).exists()
+        return obj.id in get_memberships(self.context).get(FOLLOWING)
 
 
-class RecipesAndFavoriteSerializer(serializers.ModelSerializer):
+class RecipesAndFavoriteSerializer(
+    SerializerMetricsMixin,
+    serializers.ModelSerializer
+):
+    image = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time',)
         read_only_fields = fields
 
+    def get_image(self, obj):
+        return get_image_url(obj, THUMBNAIL, self.context.get('request'))
 
-class SubsciptionsSerializer(serializers.ModelSerializer):
+
+class CookableRecipeSerializer(RecipesAndFavoriteSerializer):
+    coverage = serializers.FloatField(read_only=True)
+    missing = serializers.IntegerField(read_only=True)
+
+    class Meta(RecipesAndFavoriteSerializer.Meta):
+        fields = (*RecipesAndFavoriteSerializer.Meta.fields,
+                  'coverage', 'missing')
+        read_only_fields = fields
+
+
+class SubsciptionsSerializer(
+    SerializerMetricsMixin,
+    serializers.ModelSerializer
+):
     is_subscribed = serializers.BooleanField(default=True)
     recipes_count = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
@@ -86,22 +109,21 @@ class SubsciptionsSerializer(serializers.ModelSerializer):
         return data
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        recipes_limit = request.query_params.get('recipes_limit')
-        recipes = obj.recipes.all()
-        if recipes_limit:
-            recipes = recipes[:int(recipes_limit)]
+        if hasattr(obj, 'limited_recipes'):
+            recipes = obj.limited_recipes
+        else:
+            recipes = obj.recipes.all()
+            recipes_limit = get_recipes_limit(self.context.get('request'))
+            if recipes_limit is not None:
+                recipes = recipes[:recipes_limit]
         return RecipesAndFavoriteSerializer(recipes, many=True).data
 
     def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj).count()
+        return obj.recipes_count
 
 
 class RecipeIngredientSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-        source='ingredient.id'
-    )
+    id = serializers.IntegerField(source='ingredient.id')
     name = serializers.CharField(
         read_only=True,
         source='ingredient.name'
@@ -116,7 +138,7 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(SerializerMetricsMixin, serializers.ModelSerializer):
     tags = serializers.PrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all(),
@@ -146,89 +168,106 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
         )
 
+    def validate_ingredients(self, value):
+        ids = [item['ingredient']['id'] for item in value]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError(
+                'Ингредиенты не должны повторяться'
+            )
+        ingredients = Ingredient.objects.in_bulk(ids)
+        if len(ingredients) != len(ids):
+            raise serializers.ValidationError(
+                'Указанного ингредиента не существует'
+            )
+        return [
+            {
+                'ingredient': ingredients[item['ingredient']['id']],
+                'amount': item['amount'],
+            } for item in value
+        ]
+
+    @staticmethod
+    def save_ingredients(recipe, ingredients, existing=()):
+        existing = {item.ingredient_id: item for item in existing}
+        to_create = []
+        to_update = []
+        for item in ingredients:
+            ingredient, amount = item['ingredient'], item['amount']
+            current = existing.pop(ingredient.id, None)
+            if current is None:
+                to_create.append(IngredientQuantity(
+                    recipe=recipe, ingredient=ingredient, amount=amount
+                ))
+            elif current.amount != amount:
+                current.amount = amount
+                to_update.append(current)
+        if existing:
+            IngredientQuantity.objects.filter(
+                pk__in=[item.pk for item in existing.values()]
+            ).delete()
+        if to_update:
+            IngredientQuantity.objects.bulk_update(to_update, ('amount',))
+        if to_create:
+            IngredientQuantity.objects.bulk_create(to_create)
+        return [
+            *existing,
+            *(item.ingredient_id for item in (*to_update, *to_create)),
+        ]
+
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('recipes')
         recipe = Recipe.objects.create(**validated_data)
-        try:
-            recipe.tags.set(tags)
-        except Exception as e:
-            recipe.delete()
-            raise e
-        ingredient_recipe = [
-            IngredientQuantity(
-                recipe=recipe,
-                ingredient=Ingredient.objects.get(
-                    id=ingredient.get('ingredient')['id'].id
-                ),
-                amount=ingredient.get('amount')
-            ) for ingredient in ingredients
-        ]
-        try:
-            IngredientQuantity.objects.bulk_create(ingredient_recipe)
-        except Exception as e:
-            recipe.delete()
-            raise e
+        recipe.tags.set(tags)
+        self.save_ingredients(recipe, ingredients)
+        schedule_image_variants(recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        context = self.context['request']
-        validated_data.pop('recipes')
-
-        tags = context.data['tags']
-        instance.name = validated_data.get('name', instance.name)
-        instance.text = validated_data.get('text', instance.text)
-        instance.cooking_time = validated_data.get(
-            'cooking_time', instance.cooking_time
-        )
-        instance.image = validated_data.get('image', instance.image)
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('recipes', None)
+        image_changed = 'image' in validated_data
+        if image_changed:
+            delete_image_variants_on_commit(instance.image_variants)
+            instance.image_variants = {}
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
         instance.save()
-        instance.tags.set(tags)
-
-        IngredientQuantity.objects.filter(recipe=instance).delete()
-        ingredients = context.data['ingredients']
-        for ingredient in ingredients:
-            ingredient_model = Ingredient.objects.get(id=ingredient['id'])
-            IngredientQuantity.objects.create(
-                recipe=instance,
-                ingredient=ingredient_model,
-                amount=ingredient['amount'],
+        if tags is not None:
+            instance.tags.set(tags)
+        if ingredients is not None:
+            changed = self.save_ingredients(
+                instance,
+                ingredients,
+                IngredientQuantity.objects.filter(recipe=instance)
             )
+            if changed:
+                recipe_ingredients_changed(instance.id, changed)
+        if image_changed:
+            schedule_image_variants(instance)
         return instance
 
     def to_representation(self, instance):
         representation = super(
             RecipeSerializer, self
         ).to_representation(instance)
-        representation['tags'] = instance.tags.all().values(
-            'id', 'name', 'color', 'slug',
-        )
+        representation['tags'] = TagSerializer(
+            instance.tags.all(), many=True
+        ).data
+        view = self.context.get('view')
+        if view is not None and view.action in CARD_IMAGE_ACTIONS:
+            representation['image'] = get_image_url(
+                instance, CARD, self.context.get('request')
+            )
         return representation
 
     def get_author(self, obj):
-        if self.context.get('request').user.is_anonymous:
-            return UserSerializer(
-                get_object_or_404(User, id=obj.author.id)
-            ).data
-        return UserSerializer(
-            get_object_or_404(User, id=obj.author.id),
-            context=self.context
-        ).data
+        return UserSerializer(obj.author, context=self.context).data
 
     def get_is_favorited(self, obj):
-        check_result, user = check_user_and_request(
-            self.context.get('request')
-        )
-        if check_result:
-            return Favorite.objects.filter(
-                user=user, recipe=obj
-            ).exists()
-        return False
+        return obj.id in get_memberships(self.context).get(FAVORITES)
 
     def get_is_in_shopping_cart(self, obj):
-        check_result, user = check_user_and_request(
-            self.context.get('request')
-        )
-        if check_result:
-            return Cart.objects.filter(user=user, recipe=obj).exists()
-        return False
+        return obj.id in get_memberships(self.context).get(SHOPPING_CART)
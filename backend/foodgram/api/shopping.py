@@ -0,0 +1,76 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Sum
+
+from .batches import on_commit_batch
+from .bulk import BATCH_SIZE, bulk_upsert
+from .models import Cart, IngredientQuantity, ShoppingListItem
+
+CART_USER = 'recipe__recipes_cart__user'
+
+
+def scoped(queryset, user_field, user_ids=None, ingredient_ids=None):
+    if user_ids is None:
+        queryset = queryset.filter(**{f'{user_field}__isnull': False})
+    else:
+        queryset = queryset.filter(**{f'{user_field}__in': user_ids})
+    if ingredient_ids is not None:
+        queryset = queryset.filter(ingredient__in=ingredient_ids)
+    return queryset
+
+
+def refresh_shopping_lists(user_ids=None, ingredient_ids=None,
+                           batch_size=BATCH_SIZE):
+    removed, _ = scoped(
+        ShoppingListItem.objects, 'user', user_ids, ingredient_ids
+    ).exclude(
+        Exists(IngredientQuantity.objects.filter(
+            recipe__recipes_cart__user=OuterRef('user'),
+            ingredient=OuterRef('ingredient'),
+        ))
+    ).delete()
+    totals = scoped(
+        IngredientQuantity.objects, CART_USER, user_ids, ingredient_ids
+    ).values(CART_USER, 'ingredient').annotate(
+        total=Sum('amount')
+    ).values_list(CART_USER, 'ingredient', 'total').order_by()
+    refreshed = bulk_upsert(
+        ShoppingListItem,
+        ('user', 'ingredient', 'amount'),
+        totals.iterator(),
+        unique_fields=('user', 'ingredient'),
+        update_fields=('amount',),
+        batch_size=batch_size,
+    )
+    return refreshed, removed
+
+
+def refresh_user_shopping_lists(user_ids):
+    with transaction.atomic():
+        refresh_shopping_lists(user_ids)
+
+
+def refresh_recipe_shopping_lists(changes):
+    with transaction.atomic():
+        refresh_shopping_lists(
+            Cart.objects.filter(
+                recipe__in={recipe for recipe, _ in changes}
+            ).values('user'),
+            {ingredient for _, ingredient in changes},
+        )
+
+
+def refresh_user_shopping_lists_on_commit(user_ids):
+    on_commit_batch(refresh_user_shopping_lists, user_ids)
+
+
+def refresh_recipe_shopping_lists_on_commit(recipe_id, ingredient_ids):
+    on_commit_batch(
+        refresh_recipe_shopping_lists,
+        ((recipe_id, ingredient) for ingredient in ingredient_ids),
+    )
+
+
+def get_shopping_list(user):
+    return ShoppingListItem.objects.filter(user=user).values_list(
+        'ingredient__name', 'ingredient__measurement_unit', 'amount'
+    ).order_by('ingredient__name', 'ingredient__measurement_unit')
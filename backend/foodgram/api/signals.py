@@ -0,0 +1,253 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_tokens
+from .batches import on_commit_batch
+from .cache import (FAVORITES, FOLLOWING, INGREDIENTS_VERSION_KEY,
+                    RECIPES_VERSION_KEY, SHOPPING_CART, TAGS_VERSION_KEY,
+                    bump_membership, bump_version, bump_versions_on_commit)
+from .cookable import forget_recipes_on_commit
+from .counters import change_counter
+from .feed import (FEED_FANOUT_LIMIT, backfill_author, backfill_follow,
+                   fan_out_recipe, prune_follow, schedule_feed_task)
+from .images import delete_image_variants_on_commit
+from .metrics import install_query_recorder
+from .models import (Cart, Favorite, Follow, Ingredient, IngredientQuantity,
+                     Recipe, Tag, User)
+from .search import update_recipe_search_on_commit
+from .shopping import (refresh_recipe_shopping_lists_on_commit,
+                       refresh_shopping_lists,
+                       refresh_user_shopping_lists_on_commit)
+from .similarity import update_similarity_index_on_commit
+
+AUTHOR_FIELDS = frozenset(('email', 'username', 'first_name', 'last_name'))
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredients_changed(sender, **kwargs):
+    bump_versions_on_commit(INGREDIENTS_VERSION_KEY, RECIPES_VERSION_KEY)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tags_changed(sender, **kwargs):
+    bump_versions_on_commit(TAGS_VERSION_KEY, RECIPES_VERSION_KEY)
+
+
+def touch_recipes(**filters):
+    Recipe.objects.filter(**filters).update(updated_at=timezone.now())
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipes_changed(sender, **kwargs):
+    bump_versions_on_commit(RECIPES_VERSION_KEY)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    delete_image_variants_on_commit(instance.image_variants)
+
+
+def touch_recipe_ids(recipe_ids):
+    touch_recipes(pk__in=recipe_ids)
+    bump_version(RECIPES_VERSION_KEY)
+
+
+def recipe_ingredients_changed(recipe_id, ingredient_ids):
+    on_commit_batch(touch_recipe_ids, (recipe_id,))
+    update_recipe_search_on_commit((recipe_id,))
+    update_similarity_index_on_commit((recipe_id,))
+    refresh_recipe_shopping_lists_on_commit(recipe_id, ingredient_ids)
+
+
+@receiver((post_save, post_delete), sender=IngredientQuantity)
+def ingredient_quantity_changed(sender, instance, **kwargs):
+    recipe_ingredients_changed(instance.recipe_id, (instance.ingredient_id,))
+
+
+@receiver(post_save, sender=Ingredient)
+def index_ingredient_recipes(sender, instance, created, **kwargs):
+    if not created:
+        update_recipe_search_on_commit(IngredientQuantity.objects.filter(
+            ingredient=instance
+        ).values_list('recipe_id', flat=True))
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def index_recipe(sender, instance, **kwargs):
+    update_recipe_search_on_commit((instance.pk,))
+
+
+@receiver(post_delete, sender=Recipe)
+def forget_cookable_recipe(sender, instance, **kwargs):
+    forget_recipes_on_commit((instance.pk,))
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe_similarity(sender, instance, **kwargs):
+    update_similarity_index_on_commit((instance.pk,))
+
+
+@receiver(pre_delete, sender=Tag)
+def index_tag_recipes_similarity(sender, instance, **kwargs):
+    update_similarity_index_on_commit(Recipe.objects.filter(
+        tags=instance
+    ).values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def index_recipe_tags_similarity(sender, instance, action, reverse, pk_set,
+                                 **kwargs):
+    if action == 'pre_clear' and reverse:
+        update_similarity_index_on_commit(Recipe.objects.filter(
+            tags=instance
+        ).values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear') and not reverse:
+        update_similarity_index_on_commit((instance.pk,))
+    elif action in ('post_add', 'post_remove') and pk_set:
+        update_similarity_index_on_commit(pk_set)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        touch_recipes(tags=instance)
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        touch_recipes(pk=instance.pk)
+    elif pk_set:
+        touch_recipes(pk__in=pk_set)
+    bump_versions_on_commit(RECIPES_VERSION_KEY)
+
+
+def has_author_changes(instance, update_fields):
+    if update_fields is not None:
+        return not AUTHOR_FIELDS.isdisjoint(update_fields)
+    saved = User.objects.filter(pk=instance.pk).values_list(
+        *AUTHOR_FIELDS
+    ).first()
+    return saved is not None and saved != tuple(
+        getattr(instance, field) for field in AUTHOR_FIELDS
+    )
+
+
+@receiver(pre_save, sender=User)
+def check_author_changes(sender, instance, update_fields=None, **kwargs):
+    instance.author_changed = not instance._state.adding and (
+        has_author_changes(instance, update_fields)
+    )
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, **kwargs):
+    if instance.author_changed:
+        touch_recipes(author=instance)
+        bump_versions_on_commit(RECIPES_VERSION_KEY)
+
+
+@receiver(post_save, sender=User)
+def user_tokens_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'is_active' in update_fields:
+        transaction.on_commit(lambda: invalidate_tokens(instance.pk))
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_tokens(instance.user_id))
+
+
+def update_counter(model, pk, counter, created=None, **kwargs):
+    if created is False:
+        return
+    change_counter(model, pk, counter, 1 if created else -1)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def count_recipes(sender, instance, **kwargs):
+    update_counter(User, instance.author_id, 'recipes_count', **kwargs)
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+def count_favorites(sender, instance, **kwargs):
+    update_counter(Recipe, instance.recipe_id, 'favorites_count', **kwargs)
+
+
+@receiver((post_save, post_delete), sender=Cart)
+def count_shopping_cart(sender, instance, **kwargs):
+    update_counter(Recipe, instance.recipe_id, 'in_cart_count', **kwargs)
+
+
+@receiver(post_save, sender=Follow)
+def count_followers(sender, instance, **kwargs):
+    update_counter(User, instance.author_id, 'followers_count', **kwargs)
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+def favorites_changed(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: bump_membership(FAVORITES, instance.user_id)
+    )
+
+
+@receiver((post_save, post_delete), sender=Cart)
+def shopping_cart_changed(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: bump_membership(SHOPPING_CART, instance.user_id)
+    )
+
+
+@receiver((post_save, post_delete), sender=Follow)
+def following_changed(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: bump_membership(FOLLOWING, instance.follower_id)
+    )
+
+
+@receiver(post_save, sender=Cart)
+def shopping_list_added(sender, instance, created, **kwargs):
+    if created:
+        refresh_shopping_lists(
+            (instance.user_id,),
+            IngredientQuantity.objects.filter(
+                recipe_id=instance.recipe_id
+            ).values('ingredient'),
+        )
+
+
+@receiver(post_delete, sender=Cart)
+def shopping_list_removed(sender, instance, **kwargs):
+    refresh_user_shopping_lists_on_commit((instance.user_id,))
+
+
+@receiver(post_save, sender=Recipe)
+def feed_recipe_created(sender, instance, created, **kwargs):
+    if created:
+        schedule_feed_task(fan_out_recipe, instance.author_id, instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def feed_follow_created(sender, instance, created, **kwargs):
+    if created:
+        schedule_feed_task(
+            backfill_follow, instance.follower_id, instance.author_id
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def feed_follow_deleted(sender, instance, **kwargs):
+    count_followers(sender, instance, **kwargs)
+    schedule_feed_task(prune_follow, instance.follower_id, instance.author_id)
+    if User.objects.filter(
+        pk=instance.author_id, followers_count=FEED_FANOUT_LIMIT
+    ).exists():
+        schedule_feed_task(backfill_author, instance.author_id)
@@ -0,0 +1,170 @@
+import hashlib
+import heapq
+import operator
+import random
+from functools import lru_cache
+from itertools import groupby, islice
+
+from django.db import connection, connections, router
+
+from .batches import on_commit_batch
+from .models import IngredientQuantity, Recipe, RecipeSignatureBand
+
+SIGNATURE_BANDS = 32
+BAND_ROWS = 3
+SIGNATURE_SEED = 24
+HASH_PRIME = (1 << 61) - 1
+FEATURE_CACHE_SIZE = 1 << 16
+SIMILAR_CANDIDATES = 200
+BUCKET_RECIPES = 1000
+SIMILAR_LIMIT = 10
+MAX_SIMILAR_LIMIT = 50
+BATCH_SIZE = 1000
+BAND_COLUMNS = ('recipe_id', 'band', 'bucket')
+INSERT_BANDS = 'INSERT INTO {table} ({columns}) VALUES '.format(
+    table=RecipeSignatureBand._meta.db_table,
+    columns=', '.join(BAND_COLUMNS),
+)
+
+
+def hash_coefficients(count, seed):
+    rng = random.Random(seed)
+    return tuple(
+        (rng.randrange(1, HASH_PRIME), rng.randrange(HASH_PRIME))
+        for _ in range(count)
+    )
+
+
+HASH_COEFFICIENTS = hash_coefficients(
+    SIGNATURE_BANDS * BAND_ROWS, SIGNATURE_SEED
+)
+
+
+@lru_cache(maxsize=FEATURE_CACHE_SIZE)
+def feature_hashes(feature):
+    return tuple((a * feature + b) % HASH_PRIME for a, b in HASH_COEFFICIENTS)
+
+
+def signature_buckets(features):
+    signature = list(map(min, zip(*map(feature_hashes, features))))
+    return [
+        int.from_bytes(
+            hashlib.blake2b(
+                repr(signature[start:start + BAND_ROWS]).encode(),
+                digest_size=8,
+            ).digest(),
+            'big',
+            signed=True,
+        )
+        for start in range(0, len(signature), BAND_ROWS)
+    ]
+
+
+def recipe_features(recipe_ids=None):
+    ingredients = IngredientQuantity.objects.values_list(
+        'recipe', 'ingredient'
+    ).order_by('recipe_id')
+    tags = Recipe.tags.through.objects.values_list(
+        'recipe', 'tag'
+    ).order_by('recipe_id')
+    if recipe_ids is not None:
+        ingredients = ingredients.filter(recipe__in=recipe_ids)
+        tags = tags.filter(recipe__in=recipe_ids)
+    rows = heapq.merge(
+        ((recipe, ingredient * 2) for recipe, ingredient
+         in ingredients.iterator()),
+        ((recipe, tag * 2 + 1) for recipe, tag in tags.iterator()),
+    )
+    for recipe, group in groupby(rows, operator.itemgetter(0)):
+        yield recipe, {feature for _, feature in group}
+
+
+def write_signature_bands(recipes, batch_size):
+    bands = (
+        (recipe, band, bucket)
+        for recipe, features in recipes
+        for band, bucket in enumerate(signature_buckets(features))
+    )
+    batch_size = connection.ops.bulk_batch_size(
+        BAND_COLUMNS, range(batch_size)
+    )
+    placeholders = '({})'.format(', '.join(['%s'] * len(BAND_COLUMNS)))
+    written = 0
+    with connection.cursor() as cursor:
+        for batch in iter(lambda: list(islice(bands, batch_size)), []):
+            cursor.execute(
+                INSERT_BANDS + ', '.join([placeholders] * len(batch)),
+                [value for band in batch for value in band],
+            )
+            written += len(batch)
+    return written
+
+
+def update_similarity_index(recipe_ids=None, batch_size=BATCH_SIZE):
+    if recipe_ids is None:
+        RecipeSignatureBand.objects.all().delete()
+        return write_signature_bands(recipe_features(), batch_size)
+    recipe_ids = iter(recipe_ids)
+    written = 0
+    for chunk in iter(lambda: list(islice(recipe_ids, batch_size)), []):
+        RecipeSignatureBand.objects.filter(recipe__in=chunk).delete()
+        written += write_signature_bands(recipe_features(chunk), batch_size)
+    return written
+
+
+def update_similarity_index_on_commit(recipe_ids):
+    on_commit_batch(update_similarity_index, recipe_ids)
+
+
+def get_bucket_recipes(band, bucket):
+    return RecipeSignatureBand.objects.filter(
+        band=band, bucket=bucket
+    ).order_by('-recipe_id').values_list(
+        'recipe_id', flat=True
+    )[:BUCKET_RECIPES]
+
+
+def get_similarity_candidates(recipe_id, bands):
+    queries, params = [], []
+    for number, (band, bucket) in enumerate(bands):
+        sql, bucket_params = get_bucket_recipes(
+            band, bucket
+        ).query.sql_with_params()
+        queries.append(f'SELECT * FROM ({sql}) AS bucket{number}')
+        params.extend(bucket_params)
+    database = connections[router.db_for_read(RecipeSignatureBand)]
+    with database.cursor() as cursor:
+        cursor.execute(
+            'SELECT recipe_id, COUNT(*) AS shared FROM '
+            f'({" UNION ALL ".join(queries)}) AS buckets '
+            'WHERE recipe_id <> %s GROUP BY recipe_id '
+            'ORDER BY shared DESC, recipe_id DESC LIMIT %s',
+            (*params, recipe_id, SIMILAR_CANDIDATES),
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def jaccard(first, second):
+    return len(first & second) / len(first | second)
+
+
+def get_similar_recipes(recipe_id, limit=SIMILAR_LIMIT):
+    bands = list(RecipeSignatureBand.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('band', 'bucket'))
+    if not bands:
+        return []
+    candidates = get_similarity_candidates(recipe_id, bands)
+    if not candidates:
+        return []
+    features = dict(recipe_features([recipe_id, *candidates]))
+    target = features.pop(recipe_id, None)
+    if not target:
+        return []
+    scores = {
+        candidate: jaccard(target, candidate_features)
+        for candidate, candidate_features in features.items()
+    }
+    return heapq.nlargest(
+        limit, scores, key=lambda candidate: (scores[candidate], candidate)
+    )
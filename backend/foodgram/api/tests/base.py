@@ -0,0 +1,123 @@
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from ..models import (Cart, Favorite, Follow, Ingredient, IngredientQuantity,
+                      Recipe, Tag, User)
+from ..search import update_recipe_search
+
+RECIPES_URL = '/api/recipes/'
+RECIPES_COUNT = 110
+AUTHORS_COUNT = 5
+TAGS_COUNT = 3
+INGREDIENTS_COUNT = 5
+SEARCH_WORD = 'борщ'
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'versions',
+    },
+}
+
+
+def clear_caches():
+    for alias in TEST_CACHES:
+        caches[alias].clear()
+
+
+def is_favorited(number):
+    return bool(number % 2)
+
+
+def is_in_shopping_cart(number):
+    return bool(number % 3)
+
+
+def has_search_word(number):
+    return number % 4 == 0
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RecipeTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='reader@example.com',
+            username='reader',
+            first_name='Читатель',
+            last_name='Читателев',
+            password='password',
+        )
+        cls.authors = [
+            User.objects.create_user(
+                email=f'author{number}@example.com',
+                username=f'author{number}',
+                first_name='Автор',
+                last_name=f'Номер {number}',
+                password='password',
+            ) for number in range(AUTHORS_COUNT)
+        ]
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', slug=f'tag{number}',
+                color=f'#00000{number}'
+            ) for number in range(TAGS_COUNT)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            ) for number in range(INGREDIENTS_COUNT)
+        ]
+        for number in range(RECIPES_COUNT):
+            text = f'Описание рецепта {number}'
+            if has_search_word(number):
+                text = f'{text}, {SEARCH_WORD}'
+            recipe = Recipe.objects.create(
+                author=cls.get_author(number),
+                name=f'Рецепт {number}',
+                image=f'recipes/{number}.jpg',
+                text=text,
+                cooking_time=number + 1,
+            )
+            recipe.tags.set(cls.get_tags(number))
+            IngredientQuantity.objects.bulk_create(
+                IngredientQuantity(
+                    recipe=recipe, ingredient=ingredient, amount=number + 1
+                ) for ingredient in cls.get_ingredients(ingredients, number)
+            )
+            if is_favorited(number):
+                Favorite.objects.create(user=cls.user, recipe=recipe)
+            if is_in_shopping_cart(number):
+                Cart.objects.create(user=cls.user, recipe=recipe)
+        Follow.objects.create(follower=cls.user, author=cls.authors[0])
+        update_recipe_search()
+
+    @classmethod
+    def get_author(cls, number):
+        return cls.authors[number % AUTHORS_COUNT]
+
+    @classmethod
+    def get_tags(cls, number):
+        return cls.tags[:number % TAGS_COUNT + 1]
+
+    @staticmethod
+    def get_ingredients(ingredients, number):
+        return ingredients[:number % INGREDIENTS_COUNT + 1]
+
+    @staticmethod
+    def get_number(recipe):
+        return recipe['cooking_time'] - 1
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+
+    def get_recipes(self, params):
+        cache.clear()
+        response = self.client.get(RECIPES_URL, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
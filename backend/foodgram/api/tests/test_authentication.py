@@ -0,0 +1,94 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from ..authentication import (CachedTokenAuthentication, local_tokens,
+                              token_cache_key, tokens_version_key)
+from ..cache import get_version
+from ..models import User
+from .base import TEST_CACHES, clear_caches
+
+ME_URL = '/api/users/me/'
+LOGOUT_URL = '/api/auth/token/logout/'
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CachedTokenAuthenticationTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='reader@example.com',
+            username='reader',
+            first_name='Читатель',
+            last_name='Читателев',
+            password='password',
+        )
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        clear_caches()
+        local_tokens.tokens.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_cached_request_skips_token_lookup(self):
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        local_tokens.tokens.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(ME_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['email'], self.user.email)
+
+    def test_shared_cache_holds_ids_only(self):
+        self.client.get(ME_URL)
+        self.assertEqual(
+            cache.get(token_cache_key(self.token.key)),
+            (
+                self.user.id,
+                True,
+                get_version(tokens_version_key(self.user.id)),
+            ),
+        )
+
+    def test_logout_revokes_token(self):
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(LOGOUT_URL).status_code, 204)
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
+
+    def test_entry_cached_before_logout_is_rejected(self):
+        authentication = CachedTokenAuthentication()
+        version = get_version(tokens_version_key(self.user.id))
+        with self.captureOnCommitCallbacks(execute=True):
+            Token.objects.filter(pk=self.token.pk).delete()
+        cache.set(
+            token_cache_key(self.token.key), (self.user.id, True, version)
+        )
+        with self.assertRaises(AuthenticationFailed):
+            authentication.authenticate_credentials(self.token.key)
+
+    def test_other_user_change_keeps_cached_entry(self):
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        other = User.objects.create_user(
+            email='other@example.com',
+            username='other',
+            first_name='Другой',
+            last_name='Пользователь',
+            password='password',
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            other.first_name = 'Иной'
+            other.save()
+            Token.objects.create(user=other).delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(ME_URL).status_code, 200)
+
+    def test_deactivation_rejects_cached_entry(self):
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save(update_fields=('is_active',))
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
@@ -0,0 +1,27 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from ..cache import RECIPES_VERSION_KEY, get_version
+from .base import TEST_CACHES, clear_caches
+
+CULLED_CACHES = {
+    **TEST_CACHES,
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'culled',
+        'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_FREQUENCY': 1},
+    },
+}
+
+
+@override_settings(CACHES=CULLED_CACHES)
+class VersionsCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        clear_caches()
+
+    def test_culling_keeps_versions(self):
+        version = get_version(RECIPES_VERSION_KEY)
+        for number in range(100):
+            cache.set(f'response:{number}', number)
+        self.assertEqual(get_version(RECIPES_VERSION_KEY), version)
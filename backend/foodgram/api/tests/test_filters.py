@@ -0,0 +1,97 @@
+from itertools import product
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..filters import TAGS_MODE_ALL, TAGS_MODE_ANY
+from .base import (RECIPES_COUNT, SEARCH_WORD, RecipeTestCase, has_search_word,
+                   is_favorited, is_in_shopping_cart)
+
+FLAG_VALUES = (None, '0', '1')
+FILTER_TAGS = ('tag1', 'tag2')
+AUTHENTICATED_FILTER_QUERIES = 8
+ANONYMOUS_FILTER_QUERIES = 5
+
+
+class RecipeFilterTest(RecipeTestCase):
+
+    def get_params(self, favorited, in_cart, author, tags, tags_mode, search):
+        params = {
+            'limit': RECIPES_COUNT,
+            'is_favorited': favorited,
+            'is_in_shopping_cart': in_cart,
+            'author': author,
+            'tags': tags,
+            'tags_mode': tags_mode,
+            'search': search,
+        }
+        return {
+            name: value for name, value in params.items() if value is not None
+        }
+
+    def matches(self, number, authenticated, favorited, in_cart, author,
+                tags, tags_mode, search):
+        for value, flag in (
+            (favorited, is_favorited(number)),
+            (in_cart, is_in_shopping_cart(number)),
+        ):
+            if value is None:
+                continue
+            if not authenticated:
+                flag = False
+            if bool(int(value)) != flag:
+                return False
+        if author is not None and self.get_author(number).id != author:
+            return False
+        if tags is not None:
+            slugs = {tag.slug for tag in self.get_tags(number)}
+            check = all if tags_mode == TAGS_MODE_ALL else any
+            if not check(tag in slugs for tag in tags):
+                return False
+        return search is None or has_search_word(number)
+
+    def check_filters(self, authenticated, budget):
+        for favorited, in_cart, author, tags, tags_mode, search in product(
+            FLAG_VALUES,
+            FLAG_VALUES,
+            (None, self.authors[1].id),
+            (None, FILTER_TAGS),
+            (TAGS_MODE_ANY, TAGS_MODE_ALL),
+            (None, SEARCH_WORD),
+        ):
+            filters = (favorited, in_cart, author, tags, tags_mode, search)
+            with self.subTest(filters=filters):
+                with CaptureQueriesContext(connection) as queries:
+                    results = self.get_recipes(self.get_params(*filters))
+                self.assertLessEqual(len(queries), budget)
+                self.assertEqual(
+                    {self.get_number(recipe) for recipe in results},
+                    {
+                        number for number in range(RECIPES_COUNT)
+                        if self.matches(number, authenticated, *filters)
+                    },
+                )
+
+    def test_authenticated_filters(self):
+        self.client.force_authenticate(self.user)
+        self.check_filters(True, AUTHENTICATED_FILTER_QUERIES)
+
+    def test_anonymous_filters(self):
+        self.check_filters(False, ANONYMOUS_FILTER_QUERIES)
+
+    def test_all_filters_queries(self):
+        self.client.force_authenticate(self.user)
+        for tags_mode, expected in (
+            (TAGS_MODE_ANY, {16, 56, 76}),
+            (TAGS_MODE_ALL, {56}),
+        ):
+            params = self.get_params(
+                '0', '1', self.authors[1].id, FILTER_TAGS, tags_mode,
+                SEARCH_WORD
+            )
+            with self.subTest(tags_mode=tags_mode):
+                with self.assertNumQueries(AUTHENTICATED_FILTER_QUERIES):
+                    results = self.get_recipes(params)
+                self.assertEqual(
+                    {self.get_number(recipe) for recipe in results}, expected
+                )
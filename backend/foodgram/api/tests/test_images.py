@@ -0,0 +1,96 @@
+import shutil
+import tempfile
+from concurrent.futures import Future
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from PIL import Image
+
+from ..feed import rebuild_timelines
+from ..images import (CARD, DEFAULT_IMAGE_FORMAT, generate_image_variants,
+                      report_image_task)
+from ..models import Recipe
+from ..serializers import RecipeSerializer
+from .base import RECIPES_COUNT, RECIPES_URL, RecipeTestCase
+
+FEED_URL = f'{RECIPES_URL}feed/'
+IMAGE_SIZE = (800, 600)
+
+
+class RecipeImageTest(RecipeTestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.recipe = Recipe.objects.filter(author=self.authors[0]).first()
+        self.recipe.image = self.save_image()
+        self.recipe.save()
+        self.variants = generate_image_variants(
+            self.recipe.pk, self.recipe.image.name
+        )
+        self.recipe.refresh_from_db()
+
+    @staticmethod
+    def make_image():
+        buffer = BytesIO()
+        Image.new('RGB', IMAGE_SIZE).save(buffer, 'JPEG')
+        return ContentFile(buffer.getvalue(), name='image.jpg')
+
+    def save_image(self):
+        return default_storage.save('recipes/image.jpg', self.make_image())
+
+    def get_variant_names(self):
+        return [
+            name for formats in self.variants.values()
+            for name in formats.values()
+        ]
+
+    def test_feed_uses_card_image(self):
+        rebuild_timelines((self.user.pk,))
+        self.client.force_authenticate(self.user)
+        response = self.client.get(FEED_URL, {'limit': RECIPES_COUNT})
+        self.assertEqual(response.status_code, 200)
+        images = {
+            recipe['id']: recipe['image']
+            for recipe in response.data['results']
+        }
+        self.assertTrue(images[self.recipe.pk].endswith(
+            default_storage.url(self.variants[CARD][DEFAULT_IMAGE_FORMAT])
+        ))
+
+    def test_image_change_deletes_variants(self):
+        with mock.patch('api.serializers.schedule_image_variants'):
+            with self.captureOnCommitCallbacks(execute=True):
+                RecipeSerializer().update(
+                    self.recipe, {'image': self.make_image()}
+                )
+        for name in self.get_variant_names():
+            self.assertFalse(default_storage.exists(name))
+
+    def test_recipe_delete_deletes_variants(self):
+        for name in self.get_variant_names():
+            self.assertTrue(default_storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            Recipe.objects.get(pk=self.recipe.pk).delete()
+        for name in self.get_variant_names():
+            self.assertFalse(default_storage.exists(name))
+
+    def test_update_without_image_does_not_schedule(self):
+        Recipe.objects.filter(pk=self.recipe.pk).update(image_variants={})
+        self.recipe.refresh_from_db()
+        with mock.patch('api.serializers.schedule_image_variants') as schedule:
+            RecipeSerializer().update(self.recipe, {'name': 'Новое имя'})
+        schedule.assert_not_called()
+
+    def test_failed_task_is_logged(self):
+        future = Future()
+        future.set_exception(FileNotFoundError(self.recipe.image.name))
+        with self.assertLogs('api.images', 'ERROR'):
+            report_image_task(self.recipe.pk, self.recipe.image.name, future)
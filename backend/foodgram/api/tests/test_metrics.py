@@ -0,0 +1,36 @@
+import asyncio
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from ..metrics import (QUERIES, UNRESOLVED_VIEW, MetricsMiddleware,
+                       metrics_store)
+from ..models import Tag
+
+
+def count_tags(request):
+    return HttpResponse(Tag.objects.count())
+
+
+def get_recorded_queries():
+    values = metrics_store.views.get(UNRESOLVED_VIEW)
+    return values[QUERIES] if values else 0
+
+
+class MetricsMiddlewareTest(TestCase):
+
+    def test_sync_request_records_queries(self):
+        queries = get_recorded_queries()
+        MetricsMiddleware(count_tags)(RequestFactory().get('/'))
+        self.assertEqual(get_recorded_queries(), queries + 1)
+
+    def test_async_request_records_queries(self):
+        async def get_response(request):
+            return await sync_to_async(count_tags)(request)
+
+        middleware = MetricsMiddleware(get_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        queries = get_recorded_queries()
+        async_to_sync(middleware)(RequestFactory().get('/'))
+        self.assertEqual(get_recorded_queries(), queries + 1)
@@ -0,0 +1,74 @@
+from ..models import Follow, Recipe, User
+from .base import (INGREDIENTS_COUNT, TAGS_COUNT, RecipeTestCase, is_favorited,
+                   is_in_shopping_cart)
+
+PAGE_SIZES = (10, 100)
+AUTHENTICATED_PAGE_QUERIES = 7
+ANONYMOUS_PAGE_QUERIES = 4
+
+
+class RecipeListQueriesTest(RecipeTestCase):
+
+    def get_page(self, limit):
+        results = self.get_recipes({'limit': limit})
+        self.assertEqual(len(results), limit)
+        return results
+
+    def test_authenticated_page_queries_do_not_grow(self):
+        self.client.force_authenticate(self.user)
+        for limit in PAGE_SIZES:
+            with self.subTest(limit=limit):
+                with self.assertNumQueries(AUTHENTICATED_PAGE_QUERIES):
+                    self.get_page(limit)
+
+    def test_anonymous_page_queries_do_not_grow(self):
+        for limit in PAGE_SIZES:
+            with self.subTest(limit=limit):
+                with self.assertNumQueries(ANONYMOUS_PAGE_QUERIES):
+                    self.get_page(limit)
+
+    def test_authenticated_flags(self):
+        self.client.force_authenticate(self.user)
+        for recipe in self.get_page(100):
+            number = self.get_number(recipe)
+            self.assertEqual(recipe['is_favorited'], is_favorited(number))
+            self.assertEqual(
+                recipe['is_in_shopping_cart'], is_in_shopping_cart(number)
+            )
+            self.assertEqual(
+                recipe['author']['is_subscribed'],
+                recipe['author']['id'] == self.authors[0].id
+            )
+            self.assertEqual(len(recipe['tags']), number % TAGS_COUNT + 1)
+            self.assertEqual(
+                len(recipe['ingredients']), number % INGREDIENTS_COUNT + 1
+            )
+
+
+class AuthorChangesTest(RecipeTestCase):
+
+    def get_updated(self, author):
+        return set(Recipe.objects.filter(author=author).values_list(
+            'updated_at', flat=True
+        ))
+
+    def test_other_fields_keep_recipes(self):
+        author = User.objects.get(pk=self.authors[1].pk)
+        updated = self.get_updated(author)
+        author.set_password('changed')
+        author.save()
+        author.save(update_fields=('recipes_count', 'last_login'))
+        self.assertEqual(self.get_updated(author), updated)
+
+    def test_author_fields_touch_recipes(self):
+        author = User.objects.get(pk=self.authors[1].pk)
+        updated = self.get_updated(author)
+        author.first_name = 'Другой'
+        author.save()
+        self.assertNotEqual(self.get_updated(author), updated)
+
+    def test_unfollow_counts_followers(self):
+        author = self.authors[0]
+        Follow.objects.filter(author=author).delete()
+        author.refresh_from_db()
+        self.assertEqual(author.followers_count, 0)
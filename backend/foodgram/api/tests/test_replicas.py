@@ -0,0 +1,27 @@
+import time
+
+from django.test import SimpleTestCase
+
+from ..replicas import (NANOSECONDS, REPLICA_STICKY_SECONDS, current_replica,
+                        fresh_reads)
+
+REPLICA = 'replica1'
+
+
+class FreshReadsTest(SimpleTestCase):
+
+    def setUp(self):
+        self.token = current_replica.set(REPLICA)
+
+    def tearDown(self):
+        current_replica.reset(self.token)
+
+    def test_recent_version_reads_primary(self):
+        with fresh_reads((time.time_ns(),)):
+            self.assertIsNone(current_replica.get())
+        self.assertEqual(current_replica.get(), REPLICA)
+
+    def test_old_version_keeps_replica(self):
+        version = time.time_ns() - (REPLICA_STICKY_SECONDS + 1) * NANOSECONDS
+        with fresh_reads((version,)):
+            self.assertEqual(current_replica.get(), REPLICA)
@@ -1,7 +1,8 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import IngredientViewSet, RecipeViewSet, TagViewSet, UserViewSet
+from .views import (IngredientViewSet, RecipeViewSet, ResponseCacheStatsView,
+                    TagViewSet, UserViewSet)
 
 router_v1 = DefaultRouter()
 
@@ -13,4 +14,5 @@ router_v1.register('recipes', RecipeViewSet)
 urlpatterns = [
     path('', include(router_v1.urls)),
     path(r'auth/', include('djoser.urls.authtoken')),
+    path('cache/stats/', ResponseCacheStatsView.as_view()),
 ]
@@ -1,4 +1,30 @@
+from .cache import UserMemberships
+
+
 def check_user_and_request(request):
     if request is None or request.user.is_anonymous:
         return False, None
     return True, request.user
+
+
+def get_memberships(context):
+    if 'memberships' not in context:
+        _, user = check_user_and_request(context.get('request'))
+        context['memberships'] = UserMemberships(user)
+    return context['memberships']
+
+
+def get_recipes_limit(request):
+    if request is None:
+        return None
+    recipes_limit = request.query_params.get('recipes_limit')
+    if recipes_limit is None or not recipes_limit.isdigit():
+        return None
+    return int(recipes_limit)
+
+
+def get_limit(request, default, maximum):
+    limit = request.query_params.get('limit')
+    if limit is None or not limit.isdigit():
+        return default
+    return max(min(int(limit), maximum), 1)
@@ -1,35 +1,67 @@
-from django.http import HttpResponse
+from collections import defaultdict
+
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as DjoserViewSet
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import (IsAuthenticated,
+from rest_framework.permissions import (IsAdminUser, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from .filters import RecipeFilter, IngredientFilter
+from .cache import (INGREDIENTS_VERSION_KEY, RECIPES_VERSION_KEY,
+                    TAGS_VERSION_KEY, get_membership_versions,
+                    get_response_cache_stats, get_versions)
+from .cookable import (COOKABLE_LIMIT, MAX_COOKABLE_INGREDIENTS,
+                       MAX_COOKABLE_LIMIT, find_cookable_recipes)
+from .feed import get_feed
+from .filters import IngredientFilter, RecipeFilter
+from .mixins import (NANOSECONDS, AnonymousResponseCacheMixin, AsyncReadMixin,
+                     ConditionalGetMixin, ReplicaReadMixin)
 from .models import Cart, Favorite, Follow, Ingredient, Recipe, Tag, User
-from .pagination import LimitPageNumberPagination
+from .pagination import FeedPagination, LimitPageNumberPagination
 from .permissions import IsAdminOrAuthorOrReadOnly
-from .serializers import (IngredientSerializer, RecipesAndFavoriteSerializer,
-                          RecipeSerializer, SubsciptionsSerializer,
-                          TagSerializer, UserSerializer)
+from .renderers import (SHOPPING_LIST_FIELDS, ShoppingListCSVRenderer,
+                        ShoppingListJSONRenderer, ShoppingListTextRenderer)
+from .serializers import (CookableRecipeSerializer, IngredientSerializer,
+                          RecipesAndFavoriteSerializer, RecipeSerializer,
+                          SubsciptionsSerializer, TagSerializer,
+                          UserSerializer)
+from .shopping import get_shopping_list
+from .similarity import MAX_SIMILAR_LIMIT, SIMILAR_LIMIT, get_similar_recipes
+from .utils import check_user_and_request, get_limit, get_recipes_limit
 
 
-class IngredientViewSet(viewsets.ModelViewSet):
+class IngredientViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    AnonymousResponseCacheMixin,
+    AsyncReadMixin,
+    viewsets.ModelViewSet
+):
+    cache_versions = (INGREDIENTS_VERSION_KEY,)
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = (IngredientFilter, )
     search_fields = ('^name', )
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    AnonymousResponseCacheMixin,
+    AsyncReadMixin,
+    viewsets.ReadOnlyModelViewSet
+):
+    cache_versions = (TAGS_VERSION_KEY,)
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
 
 
-class UserViewSet(DjoserViewSet):
+class UserViewSet(ReplicaReadMixin, AsyncReadMixin, DjoserViewSet):
+    async_actions = ('subscriptions',)
     queryset = User.objects.all()
     serializer_class = UserSerializer
     pagination_class = LimitPageNumberPagination
@@ -43,7 +75,7 @@ class UserViewSet(DjoserViewSet):
     def me(self, request):
         if request.user.is_anonymous:
             return Response(status=401)
-        serializer = UserSerializer(request.user)
+        serializer = UserSerializer(User.objects.get(pk=request.user.pk))
         return Response(serializer.data)
 
     @action(
@@ -53,13 +85,22 @@ class UserViewSet(DjoserViewSet):
         pagination_class=LimitPageNumberPagination
     )
     def subscriptions(self, request):
-        subscriptions = User.objects.filter(following__follower=request.user)
-        pages = self.paginate_queryset(subscriptions)
+        pages = self.paginate_queryset(self.get_subscriptions())
+        recipes = defaultdict(list)
+        for recipe in Recipe.objects.first_per_author(
+            pages, get_recipes_limit(request)
+        ):
+            recipes[recipe.author_id].append(recipe)
+        for author in pages:
+            author.limited_recipes = recipes[author.id]
         serializer = SubsciptionsSerializer(
             pages, many=True, context={'request': request}
         )
         return self.get_paginated_response(serializer.data)
 
+    def get_subscriptions(self):
+        return User.objects.filter(following__follower=self.request.user)
+
     @action(
         detail=True,
         methods=['post', 'delete'],
@@ -92,7 +133,14 @@ class UserViewSet(DjoserViewSet):
         )
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    AnonymousResponseCacheMixin,
+    AsyncReadMixin,
+    viewsets.ModelViewSet
+):
+    cache_versions = (RECIPES_VERSION_KEY,)
     permission_classes = (IsAuthenticatedOrReadOnly, IsAdminOrAuthorOrReadOnly)
     http_method_names = ('get', 'post', 'delete', 'patch',)
     serializer_class = RecipeSerializer
@@ -101,8 +149,36 @@ class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     pagination_class = LimitPageNumberPagination
 
+    def get_queryset(self):
+        return Recipe.objects.with_related()
+
+    def get_condition_versions(self, request, kwargs):
+        if self.action != 'retrieve':
+            return super().get_condition_versions(request, kwargs)
+        try:
+            updated_at = Recipe.objects.filter(
+                pk=kwargs['pk']
+            ).values_list('updated_at', flat=True).first()
+        except ValueError:
+            return None
+        if updated_at is None:
+            return None
+        versions = [
+            int(updated_at.timestamp() * NANOSECONDS),
+            *get_versions((TAGS_VERSION_KEY, INGREDIENTS_VERSION_KEY)),
+        ]
+        check_result, user = check_user_and_request(request)
+        if check_result:
+            versions += get_membership_versions(user.id)
+        return versions
+
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        recipe = serializer.save(author=self.request.user)
+        serializer.instance = self.get_queryset().get(pk=recipe.pk)
+
+    def perform_update(self, serializer):
+        recipe = serializer.save()
+        serializer.instance = self.get_queryset().get(pk=recipe.pk)
 
     @action(
         detail=True,
@@ -127,39 +203,90 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(
         detail=False,
         methods=['get'],
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[
+            ShoppingListTextRenderer,
+            ShoppingListCSVRenderer,
+            ShoppingListJSONRenderer,
+        ]
     )
     def download_shopping_cart(self, request):
-        shopping_cart = Cart.objects.filter(user=request.user).all()
-        shopping_list = {}
-        for item in shopping_cart:
-            for ingredient in item.recipe.recipes.all():
-                name = ingredient.ingredient.name
-                measurement_unit = (
-                    ingredient.ingredient.measurement_unit
-                )
-                amount = ingredient.amount
-                if name not in shopping_list:
-                    shopping_list[name] = {
-                        'name': name,
-                        'measurement_unit': measurement_unit,
-                        'amount': amount
-                    }
-                else:
-                    shopping_list[name]['amount'] += amount
-        content = (
-            [
-                f'{item["name"]}({item["measurement_unit"]})'
-                f'-{item["amount"]}\n'
-                for item in shopping_list.values()
-            ]
+        shopping_list = get_shopping_list(request.user)
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(shopping_list.iterator()),
+            content_type=f'{renderer.media_type}; charset=utf-8'
         )
-        response = HttpResponse(content, content_type='text/plain')
         response['Content-Disposition'] = (
-            'attachment; filename={0}'.format('cart.txt')
+            'attachment; filename={0}'.format(f'cart.{renderer.format}')
         )
         return response
 
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=[IsAuthenticated]
+    )
+    def shopping_list(self, request):
+        return Response([
+            dict(zip(SHOPPING_LIST_FIELDS, row))
+            for row in get_shopping_list(request.user)
+        ])
+
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=[IsAuthenticated],
+        pagination_class=FeedPagination
+    )
+    def feed(self, request):
+        ids = self.paginator.paginate_feed(
+            lambda before, limit: get_feed(request.user, before, limit),
+            request
+        )
+        recipes = self.get_queryset().in_bulk(ids)
+        serializer = self.get_serializer(
+            [recipes[pk] for pk in ids if pk in recipes], many=True
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        recipe = get_object_or_404(Recipe, pk=pk)
+        ids = get_similar_recipes(
+            recipe.pk, get_limit(request, SIMILAR_LIMIT, MAX_SIMILAR_LIMIT)
+        )
+        recipes = Recipe.objects.in_bulk(ids)
+        serializer = RecipesAndFavoriteSerializer(
+            [recipes[pk] for pk in ids if pk in recipes], many=True
+        )
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def cookable(self, request):
+        ingredients = request.query_params.getlist('ingredients')
+        if not ingredients or not all(
+            ingredient.isdigit() for ingredient in ingredients
+        ):
+            return Response(
+                {'errors': 'Укажите id имеющихся ингредиентов'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(ingredients) > MAX_COOKABLE_INGREDIENTS:
+            return Response(
+                {'errors': 'Можно указать не более '
+                           f'{MAX_COOKABLE_INGREDIENTS} ингредиентов'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        recipes = find_cookable_recipes(
+            map(int, ingredients),
+            get_limit(request, COOKABLE_LIMIT, MAX_COOKABLE_LIMIT),
+        )
+        serializer = CookableRecipeSerializer(
+            recipes, many=True, context={'request': request}
+        )
+        return Response(serializer.data)
+
     @staticmethod
     def create_obj(user, pk, model):
         recipe = get_object_or_404(Recipe, pk=pk)
@@ -188,3 +315,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
             },
             status=status.HTTP_400_BAD_REQUEST
         )
+
+
+class ResponseCacheStatsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(get_response_cache_stats())